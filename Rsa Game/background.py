@@ -0,0 +1,105 @@
+"""Run RSA work off the Tk main thread.
+
+Work runs on a single worker thread. The Tk thread polls the task with
+widget.after and receives results, errors and progress there, so
+callbacks can touch widgets safely. Cancellation is cooperative: the work
+function calls task.report() between chunks, which raises TaskCancelled
+once cancel() has been requested.
+"""
+import threading
+
+POLL_MS = 50
+DEFAULT_CHUNK_SIZE = 256  # items processed between progress reports
+
+_executor = None
+
+
+class TaskCancelled(Exception):
+    """Raised inside a work function when its task has been cancelled."""
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # Imported here, with the first task, to keep it off the startup path
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rsa-worker")
+    return _executor
+
+
+class BackgroundTask:
+    def __init__(self, widget, work, on_done, on_error=None, on_progress=None,
+                 on_finish=None):
+        """Start work(task) on the worker thread.
+
+        on_done(result) or on_error(exception) is called on the Tk thread
+        when the work ends, unless it was cancelled. on_progress(fraction)
+        is called while it runs (fraction is None until reported) and
+        on_finish() is always called last; for a cancelled task it runs
+        from cancel() itself, so it cannot undo a task started after it.
+        """
+        self.widget = widget
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.progress = None
+        self._cancel_event = threading.Event()
+        self.future = _get_executor().submit(work, self)
+        self.widget.after(POLL_MS, self._poll)
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Request cancellation; results of a cancelled task are dropped."""
+        self._cancel_event.set()
+        self.future.cancel()
+        on_finish, self.on_finish = self.on_finish, None
+        if on_finish:
+            on_finish()
+
+    def report(self, done, total):
+        """Record progress from the worker thread; raises if cancelled."""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+        self.progress = done / total if total else 1.0
+
+    def _poll(self):
+        if not self.future.done():
+            if self.on_progress:
+                self.on_progress(self.progress)
+            self.widget.after(POLL_MS, self._poll)
+            return
+        try:
+            if not self.cancelled:
+                try:
+                    result = self.future.result()
+                except TaskCancelled:
+                    pass
+                except Exception as err:
+                    if self.on_error:
+                        self.on_error(err)
+                else:
+                    self.on_done(result)
+        finally:
+            if self.on_finish:
+                self.on_finish()
+
+
+def run_chunked(task, func, items, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply func to successive slices of items, reporting progress.
+
+    func takes a slice and returns a list; the results are concatenated.
+    task may be None to run without progress reports or cancellation.
+    """
+    if task is None:
+        return list(func(items))
+    results = []
+    total = len(items)
+    task.report(0, total)
+    for start in range(0, total, chunk_size):
+        results.extend(func(items[start:start + chunk_size]))
+        task.report(min(start + chunk_size, total), total)
+    return results
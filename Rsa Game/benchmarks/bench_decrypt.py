@@ -0,0 +1,38 @@
+"""Plain vs. CRT decryption cost per block across modulus sizes.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_decrypt.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keygen
+import rsa_engine
+
+MODULUS_BITS = [26, 256, 512, 1024, 2048]
+
+
+def per_block_us(key, ciphertext, crt, repeat):
+    total = min(timeit.repeat(lambda: rsa_engine.decrypt_blocks(ciphertext, key, crt),
+                              number=1, repeat=repeat))
+    return total / len(ciphertext) * 1e6
+
+
+def main(blocks=50, repeat=5):
+    rng = random.Random(2024)
+    print(f"{'bits':>5} {'plain (us)':>12} {'crt (us)':>10} {'speedup':>8}  match")
+    for bits in MODULUS_BITS:
+        key = keygen.generate_keypair(bits, 65537 if bits > 32 else 17, rng)
+        ciphertext = [pow(rng.randrange(key.n), key.e, key.n) for _ in range(blocks)]
+        plain = per_block_us(key, ciphertext, False, repeat)
+        crt = per_block_us(key, ciphertext, True, repeat)
+        match = rsa_engine.crt_matches_plain(ciphertext, key)
+        print(f"{key.n.bit_length():>5} {plain:>12.2f} {crt:>10.2f} {plain / crt:>7.1f}x  {match}")
+
+
+if __name__ == "__main__":
+    main()
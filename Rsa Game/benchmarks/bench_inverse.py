@@ -0,0 +1,71 @@
+"""Per-call latency of the modular inverse across key sizes.
+
+Compares the old recursive extended GCD with the iterative one and with
+the built-in pow(e, -1, phi) that mod_inverse now uses.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_inverse.py
+"""
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rsa_engine
+
+BITS = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+
+
+def recursive_extended_gcd(a, b):
+    """The original recursive implementation, kept for comparison."""
+    if a == 0:
+        return (b, 0, 1)
+    g, y, x = recursive_extended_gcd(b % a, a)
+    return (g, x - (b // a) * y, y)
+
+
+def recursive_mod_inverse(e, phi):
+    g, x, _ = recursive_extended_gcd(e, phi)
+    return x % phi if g == 1 else None
+
+
+def iterative_mod_inverse(e, phi):
+    g, x, _ = rsa_engine.extended_gcd(e, phi)
+    return x % phi if g == 1 else None
+
+
+def sample(bits, count, rng):
+    """(e, phi) pairs with an invertible e of roughly the same size as phi."""
+    pairs = []
+    while len(pairs) < count:
+        phi = rng.getrandbits(bits) | (1 << (bits - 1))
+        e = rng.randrange(3, phi) | 1
+        if math.gcd(e, phi) == 1:
+            pairs.append((e, phi))
+    return pairs
+
+
+def per_call_us(func, pairs, repeat):
+    total = min(timeit.repeat(lambda: [func(e, phi) for e, phi in pairs], number=1, repeat=repeat))
+    return total / len(pairs) * 1e6
+
+
+def main(count=200, repeat=5):
+    rng = random.Random(2024)
+    print(f"{'bits':>5} {'recursive (us)':>15} {'iterative (us)':>15} {'pow (us)':>10}")
+    for bits in BITS:
+        pairs = sample(bits, count, rng)
+        try:
+            recursive = f"{per_call_us(recursive_mod_inverse, pairs, repeat):>15.2f}"
+        except RecursionError:
+            recursive = f"{'RecursionError':>15}"
+        print(f"{bits:>5} {recursive} "
+              f"{per_call_us(iterative_mod_inverse, pairs, repeat):>15.2f} "
+              f"{per_call_us(rsa_engine.mod_inverse, pairs, repeat):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Load test for the shared leaderboard server, entirely on one machine.
+
+Starts a server on a free localhost port with a temporary log, fires
+concurrent result submissions at it and reports the sustained rate.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_leaderboard_server.py [submissions] [concurrency]
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import leaderboard_server
+import leaderboard_store
+
+
+async def post(port, entry):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(entry).encode("utf-8")
+    writer.write(b"POST /results HTTP/1.1\r\nHost: localhost\r\n"
+                 b"Content-Type: application/json\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.startswith(b"HTTP/1.1 200")
+
+
+async def run(submissions, concurrency):
+    with tempfile.TemporaryDirectory() as directory:
+        store = leaderboard_store.JsonLinesStore(os.path.join(directory, "leaderboard.jsonl"))
+        server = await leaderboard_server.LeaderboardServer(store).start("127.0.0.1", 0)
+        rng = random.Random(2024)
+        entries = [{"name": f"player{i}", "time": round(rng.uniform(5, 300), 2),
+                    "difficulty": rng.choice(["Easy", "Medium", "Hard"])}
+                   for i in range(submissions)]
+        limit = asyncio.Semaphore(concurrency)
+
+        async def submit(entry):
+            async with limit:
+                return await post(server.port, entry)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(submit(e) for e in entries))
+        elapsed = time.perf_counter() - start
+        await server.close()
+        saved = leaderboard_store.JsonLinesStore(store.path).count
+    print(f"{sum(results)}/{submissions} accepted, {saved} on disk, "
+          f"{submissions / elapsed:.0f} submissions/s at concurrency {concurrency}")
+
+
+def main(submissions=2000, concurrency=100):
+    asyncio.run(run(submissions, concurrency))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
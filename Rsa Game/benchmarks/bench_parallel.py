@@ -0,0 +1,47 @@
+"""Scaling of process-pool encryption/decryption at 1/2/4/8 workers.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_parallel.py [modulus_bits] [payload_kb]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keygen
+import parallel
+import rsa_engine
+
+WORKERS = [1, 2, 4, 8]
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(bits=1024, payload_kb=64):
+    rng = random.Random(2024)
+    key = keygen.generate_keypair(bits, rng=rng)
+    data = rng.randbytes(payload_kb * 1024)
+    blocks = rsa_engine.pack_bytes(data, key.n)
+    print(f"{key.n.bit_length()}-bit modulus, {payload_kb} KB payload, {len(blocks)} blocks, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'encrypt (s)':>12} {'decrypt (s)':>12} {'decrypt speedup':>16}")
+    baseline = None
+    for workers in WORKERS:
+        # One worker always runs serially (use_serial) and is the baseline; min_work=0
+        # makes every larger count use the pool, so its startup cost is included
+        options = dict(workers=workers, min_work=0 if workers > 1 else parallel.MIN_PARALLEL_WORK)
+        ciphertext, enc = timed(parallel.encrypt_blocks, blocks, key.e, key.n, **options)
+        plain, dec = timed(parallel.decrypt_blocks, ciphertext, key, **options)
+        assert rsa_engine.unpack_blocks(plain, key.n) == data
+        baseline = baseline or dec
+        print(f"{workers:>7} {enc:>12.3f} {dec:>12.3f} {baseline / dec:>15.1f}x")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
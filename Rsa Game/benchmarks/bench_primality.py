@@ -0,0 +1,51 @@
+"""Compare the old random-witness Miller-Rabin with the deterministic path.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_primality.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rsa_engine
+
+SIZES = [
+    ("2-digit", lambda rng: rng.randint(10, 99)),
+    ("3-digit", lambda rng: rng.randint(100, 999)),
+    ("4-digit", lambda rng: rng.randint(1000, 9999)),
+    ("64-bit", lambda rng: rng.getrandbits(64) | (1 << 63) | 1),
+    ("512-bit", lambda rng: rng.getrandbits(512) | (1 << 511) | 1),
+]
+
+
+def sample(make, count, rng):
+    """Half random odd candidates, half primes, so both outcomes are timed."""
+    numbers = [make(rng) for _ in range(count)]
+    primes = []
+    while len(primes) < count // 2:
+        candidate = make(rng)
+        if rsa_engine.is_prime(candidate):
+            primes.append(candidate)
+    return numbers[:count - len(primes)] + primes
+
+
+def per_call_us(func, numbers, repeat):
+    total = min(timeit.repeat(lambda: [func(x) for x in numbers], number=1, repeat=repeat))
+    return total / len(numbers) * 1e6
+
+
+def main(count=200, repeat=5):
+    rng = random.Random(2024)
+    print(f"{'size':<8} {'old MR (us)':>12} {'new (us)':>10} {'speedup':>8}")
+    for label, make in SIZES:
+        numbers = sample(make, count, rng)
+        old = per_call_us(rsa_engine.miller_rabin, numbers, repeat)
+        new = per_call_us(rsa_engine.is_prime, numbers, repeat)
+        print(f"{label:<8} {old:>12.2f} {new:>10.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
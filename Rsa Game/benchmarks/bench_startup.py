@@ -0,0 +1,51 @@
+"""Time to first window, for comparing startup on slow machines.
+
+Launches the game repeatedly with --startup-time and reports the median
+time main.py measures to its first drawn window, plus the wall time of
+the whole launch. The import time of game_application in a fresh
+interpreter is reported as well; that part also works without a display.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_startup.py [launches]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = ("import time; start = time.perf_counter(); import game_application; "
+                  "print((time.perf_counter() - start) * 1000)")
+
+
+def run(args):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=GAME_DIR, capture_output=True, text=True)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main(launches=5):
+    import_ms = []
+    for _ in range(launches):
+        result, _ = run(["-c", IMPORT_SNIPPET])
+        if result.returncode:
+            sys.exit(result.stderr)
+        import_ms.append(float(result.stdout))
+    print(f"import game_application: {statistics.median(import_ms):8.1f} ms (median of {launches})")
+
+    window_ms, wall_ms = [], []
+    for _ in range(launches):
+        result, wall = run(["main.py", "--startup-time"])
+        if result.returncode:
+            print("Could not open a window (no display?):", result.stderr.strip().splitlines()[-1])
+            return
+        window_ms.append(float(result.stdout.split()[3]))
+        wall_ms.append(wall)
+    print(f"first window:            {statistics.median(window_ms):8.1f} ms (median of {launches})")
+    print(f"whole launch (wall):     {statistics.median(wall_ms):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,180 @@
+"""Headless benchmark suite for the RSA primitives and the game pipeline.
+
+Covers the work behind each game stage, without Tk, for the three
+difficulty levels and for 512/1024/2048-bit keys:
+
+    is_prime      primality test of p
+    mod_inverse   d = e^-1 mod phi
+    encrypt       per-character encryption's exponentiations (pow_blocks)
+    decrypt       decrypt_message's work: CRT decryption
+    pipeline      one cold round: validate, generate keys, encrypt, decrypt
+
+The key cache and the per-character lookup tables are cleared in every
+pipeline operation, and encrypt times pow_blocks rather than the table,
+so the cases measure the arithmetic rather than cache hits.
+
+plus leaderboard saves and page loads. Each case reports operations per
+second and the peak memory one operation allocates. Results can be saved
+as a baseline and later runs compared with it; a case more than
+--tolerance slower (or hungrier) than its baseline is flagged and the
+exit status is 1. Baselines are machine-specific, so save one per machine.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_suite.py --save      # record a baseline
+    python benchmarks/bench_suite.py             # compare with it
+    python benchmarks/bench_suite.py -k decrypt  # only matching cases
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keygen
+import leaderboard_store
+import rsa_engine
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCE = 0.25  # fraction slower (or more memory) than baseline that counts as a regression
+KEY_BITS = [512, 1024, 2048]
+MESSAGE = "The quick brown fox jumps over the lazy dog."
+LEADERBOARD_SIZE = 10000  # results already stored when timing leaderboard loads
+
+
+def sizes(rng):
+    """(label, p, q, e, difficulty) for each difficulty and key size."""
+    for difficulty, name in rsa_engine.DIFFICULTY_NAMES.items():
+        p, q, e = keygen.generate_practice_round(difficulty, rng)
+        yield name.lower(), p, q, e, difficulty
+    for bits in KEY_BITS:
+        key = keygen.generate_keypair(bits, rng=rng)
+        yield f"{bits}bit", key.p, key.q, key.e, None
+
+
+def rsa_cases(rng):
+    """(name, func) pairs for the RSA primitives and the round pipeline."""
+    for label, p, q, e, difficulty in sizes(rng):
+        key = rsa_engine.generate_keys(p, q, e)
+        ciphertext = rsa_engine.encrypt(MESSAGE, e, key.n)
+        codes = list(map(ord, MESSAGE))
+
+        def pipeline(p=p, q=q, e=e, difficulty=difficulty):
+            rsa_engine.clear_key_cache()
+            rsa_engine._char_table.cache_clear()
+            assert rsa_engine.validate_primes(p, q, difficulty) is None
+            key = rsa_engine.generate_keys(p, q, e)
+            encrypted = rsa_engine.encrypt(MESSAGE, key.e, key.n)
+            return rsa_engine.decrypt_with_key(encrypted, key)
+
+        yield f"is_prime/{label}", lambda p=p: rsa_engine.is_prime(p)
+        yield f"mod_inverse/{label}", lambda e=e, phi=key.phi: rsa_engine.mod_inverse(e, phi)
+        yield f"encrypt/{label}", lambda e=e, n=key.n, c=codes: rsa_engine.pow_blocks(c, e, n)
+        yield f"decrypt/{label}", lambda c=ciphertext, key=key: rsa_engine.decrypt_blocks(c, key)
+        yield f"pipeline/{label}", pipeline
+
+
+def leaderboard_cases(directory, rng):
+    """(name, func) pairs for saving to and loading from the leaderboard."""
+    store = leaderboard_store.JsonLinesStore(os.path.join(directory, "leaderboard.jsonl"))
+    names = list(rsa_engine.DIFFICULTY_NAMES.values())
+    store.add_many([{"name": f"player{i}", "time": round(rng.uniform(5, 300), 2),
+                     "difficulty": rng.choice(names)} for i in range(LEADERBOARD_SIZE)])
+    # Before the saves below grow the log
+    yield "leaderboard_reopen", lambda: leaderboard_store.JsonLinesStore(store.path)
+    for name in names:
+        entry = {"name": "bench", "time": 120.0, "difficulty": name}
+        yield f"leaderboard_save/{name.lower()}", lambda entry=entry: store.add(dict(entry))
+        yield f"leaderboard_load/{name.lower()}", lambda name=name: store.ranking(name, 1, 10)
+
+
+def measure(func, repeat):
+    """(operations per second, peak bytes allocated by one operation)."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat, number))
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return number / best, peak
+
+
+def compare(result, baseline, tolerance):
+    """Regression notes for one case against its baseline entry."""
+    notes = []
+    if result["ops_per_sec"] < baseline["ops_per_sec"] * (1 - tolerance):
+        notes.append("slower")
+    if result["peak_bytes"] > baseline["peak_bytes"] * (1 + tolerance) + 1024:
+        notes.append("more memory")
+    return notes
+
+
+def run(pattern, repeat, baseline, tolerance):
+    rng = random.Random(2024)
+    results = {}
+    regressions = 0
+    print(f"{'case':<28} {'ops/s':>12} {'peak KiB':>9} {'baseline':>12} {'change':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        cases = list(rsa_cases(rng)) + list(leaderboard_cases(directory, rng))
+        for name, func in cases:
+            if pattern and pattern not in name:
+                continue
+            ops, peak = measure(func, repeat)
+            results[name] = {"ops_per_sec": ops, "peak_bytes": peak}
+            line = f"{name:<28} {ops:>12.1f} {peak / 1024:>9.1f}"
+            if name in baseline:
+                old = baseline[name]
+                notes = compare(results[name], old, tolerance)
+                regressions += bool(notes)
+                line += f" {old['ops_per_sec']:>12.1f} {ops / old['ops_per_sec'] - 1:>+8.0%}"
+                if notes:
+                    line += "  REGRESSION: " + ", ".join(notes)
+            print(line)
+    return results, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the RSA game headlessly.")
+    parser.add_argument("-k", dest="pattern", default="",
+                        help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timing repeats per case; the best is kept (default: %(default)s)")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="baseline file (default: benchmarks/baseline.json)")
+    parser.add_argument("--save", action="store_true",
+                        help="store these results as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="allowed slowdown before flagging, as a fraction (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    results, regressions = run(args.pattern, args.repeat, baseline, args.tolerance)
+    if args.save:
+        if os.path.exists(args.baseline):
+            # Keep baselines for cases this run skipped
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline for {len(results)} cases to {args.baseline}")
+    elif not baseline:
+        print("No baseline to compare with; run with --save to record one.")
+    elif regressions:
+        print(f"{regressions} case(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
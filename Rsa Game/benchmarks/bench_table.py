@@ -0,0 +1,78 @@
+"""Cost of the per-character lookup tables against direct exponentiation.
+
+For each key size and message length, times encryption and decryption
+with plain pow_blocks, with a cold table (built during the call) and with
+a warm one. The build cost is cold minus warm; the table pays off once
+cold beats direct, which is what TABLE_MIN_LENGTH and TABLE_MIN_REPEATS
+in rsa_engine are set from. Rows where table_pow_blocks skips the table
+(too short, or too few repeats) are marked "skipped": cold and direct
+then run the same code, so there is nothing to compare.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_table.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keygen
+import rsa_engine
+
+TEXT = ("RSA is a public-key cryptosystem. Choose two primes p and q, compute "
+        "n = p * q and phi = (p - 1) * (q - 1), then pick e coprime with phi. ")
+LENGTHS = [8, 16, 24, 32, 64, 256, 4096]
+LARGE_KEY_LENGTHS = [8, 16, 24, 32, 64, 256]  # direct decryption is slow with big keys
+
+
+def best_of(func, repeat=3, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def uses_table(values, exponent, n):
+    """True if table_pow_blocks would build a table for values."""
+    rsa_engine._char_table.cache_clear()
+    rsa_engine.table_pow_blocks(values, exponent, n)
+    return bool(rsa_engine._char_table(exponent, n))
+
+
+def report(label, key, lengths=LENGTHS):
+    print(f"{label} (n has {key.n.bit_length()} bits)")
+    print(f"{'length':>7} {'direct us':>10} {'cold us':>10} {'warm us':>10} {'build us':>10}  table pays")
+    for length in lengths:
+        message = (TEXT * (length // len(TEXT) + 1))[:length]
+        blocks = list(map(ord, message))
+        ciphertext = rsa_engine.pow_blocks(blocks, key.e, key.n)
+        for name, values, exponent in (("encrypt", blocks, key.e), ("decrypt", ciphertext, key.d)):
+            direct = best_of(lambda: rsa_engine.pow_blocks(values, exponent, key.n))
+            cold = best_of(lambda: rsa_engine.table_pow_blocks(values, exponent, key.n),
+                           setup=rsa_engine._char_table.cache_clear)
+            warm = best_of(lambda: rsa_engine.table_pow_blocks(values, exponent, key.n))
+            if not uses_table(values, exponent, key.n):
+                verdict = "skipped"
+            else:
+                verdict = "yes" if cold < direct else "no"
+            print(f"{length:>7} {direct * 1e6:>10.1f} {cold * 1e6:>10.1f} {warm * 1e6:>10.1f} "
+                  f"{(cold - warm) * 1e6:>10.1f}  {name}: {verdict}")
+    print()
+
+
+def main():
+    rng = random.Random(2024)
+    p, q, e = keygen.generate_practice_round(3, rng)
+    report("Hard round", rsa_engine.generate_keys(p, q, e))
+    report("512-bit key", keygen.generate_keypair(512, rng=rng), LARGE_KEY_LENGTHS)
+    print(rsa_engine.char_table_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Bulk grading with and without the NumPy path, for game-sized keys.
+
+Encrypts and decrypts a batch of random Easy/Medium/Hard rounds with
+rsa_engine.batch_encrypt/batch_decrypt, once vectorised (if NumPy is
+installed) and once with pow() per character.
+
+Run from the "Rsa Game" directory:
+    python benchmarks/bench_vector.py [rounds] [message_length]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import keygen
+import rsa_engine
+import rsa_vector
+
+
+def make_rounds(count, length, rng):
+    rounds = []
+    for _ in range(count):
+        p, q, e = keygen.generate_practice_round(rng.choice([1, 2, 3]), rng)
+        message = "".join(chr(rng.randrange(32, 127)) for _ in range(length))
+        rounds.append((p, q, e, message))
+    return rounds
+
+
+def grade(rounds):
+    start = time.perf_counter()
+    encrypted = rsa_engine.batch_encrypt(rounds)
+    decrypted = rsa_engine.batch_decrypt([(p, q, e, c) for (p, q, e, _), c in zip(rounds, encrypted)])
+    assert decrypted == [message for _, _, _, message in rounds]
+    return time.perf_counter() - start
+
+
+def main(count=1000, length=40):
+    rounds = make_rounds(count, length, random.Random(2024))
+    if rsa_vector.available():
+        vectorised = grade(rounds)
+        print(f"numpy: {vectorised * 1000:8.1f} ms for {count} rounds of {length} characters")
+    else:
+        vectorised = None
+        print("numpy: not installed")
+    min_blocks = rsa_vector.MIN_BLOCKS
+    rsa_vector.MIN_BLOCKS = float("inf")  # force the pow() path
+    try:
+        plain = grade(rounds)
+    finally:
+        rsa_vector.MIN_BLOCKS = min_blocks
+    print(f"pow:   {plain * 1000:8.1f} ms" + (f"  ({plain / vectorised:.1f}x slower)" if vectorised else ""))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,120 @@
+"""Compact ciphertext storage.
+
+A Ciphertext keeps its blocks as fixed-width big-endian integers in one
+bytes buffer, sized from n, instead of a list of Python ints: a game
+block takes 4 bytes rather than a pointer plus a boxed int. Slicing
+returns a view of the same buffer, blocks are converted to ints only as
+they are read, and the decimal form is built only for display.
+
+Files written by save() start with a small header (magic, version, flags,
+block width and n), followed by the blocks in the same layout as
+rsa_stream.write_ciphertext.
+"""
+import struct
+
+import rsa_stream
+
+MAGIC = b"RSAC"
+VERSION = 1
+HEADER = struct.Struct(">4sBBH")  # magic, version, flags, block width
+PACKED = 0x01  # flag: blocks are packed-mode, not one per character
+
+
+class Ciphertext:
+    """Immutable sequence of ciphertext blocks for a modulus n."""
+    __slots__ = ("n", "width", "packed", "_data")
+
+    def __init__(self, n, data=b"", packed=False):
+        """Wrap raw block bytes (a multiple of the block width) without copying."""
+        self.n = n
+        self.width = rsa_stream.block_width(n)
+        self.packed = packed
+        self._data = memoryview(data).cast("B")
+        if len(self._data) % self.width:
+            raise ValueError("Ciphertext data is not a whole number of blocks!")
+
+    @classmethod
+    def from_blocks(cls, blocks, n, packed=False):
+        """Store integer blocks, each of which must be below n."""
+        width = rsa_stream.block_width(n)
+        data = bytearray()
+        for c in blocks:
+            if not 0 <= c < n:
+                raise ValueError(f"Ciphertext block {c} is not below n = {n}!")
+            data += c.to_bytes(width, "big")
+        return cls(n, data, packed)
+
+    def __len__(self):
+        return len(self._data) // self.width
+
+    def __getitem__(self, index):
+        """One block as an int, or a slice as a Ciphertext sharing this buffer."""
+        width = self.width
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Ciphertext slices cannot have a step")
+            return Ciphertext(self.n, self._data[start * width:max(start, stop) * width], self.packed)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Ciphertext index out of range")
+        return int.from_bytes(self._data[index * width:(index + 1) * width], "big")
+
+    def __iter__(self):
+        data, width = self._data, self.width
+        for start in range(0, len(data), width):
+            yield int.from_bytes(data[start:start + width], "big")
+
+    def __eq__(self, other):
+        if not isinstance(other, Ciphertext):
+            return NotImplemented
+        return (self.n, self.packed, self._data) == (other.n, other.packed, other._data)
+
+    def __reduce__(self):
+        # memoryviews cannot be pickled; worker processes get a bytes copy
+        return (Ciphertext, (self.n, self.to_bytes(), self.packed))
+
+    def __repr__(self):
+        return f"Ciphertext(n={self.n}, blocks={len(self)}, packed={self.packed})"
+
+    @property
+    def nbytes(self):
+        return len(self._data)
+
+    def to_bytes(self):
+        """The blocks as raw fixed-width bytes, without a header."""
+        return self._data.tobytes()
+
+    def decimal(self, separator=" "):
+        """The blocks as decimal numbers, for showing to the player."""
+        return separator.join(map(str, self))
+
+    def write(self, f):
+        """Write the header and blocks to a binary file object."""
+        f.write(HEADER.pack(MAGIC, VERSION, PACKED if self.packed else 0, self.width))
+        f.write(self.n.to_bytes(self.width, "big"))
+        f.write(self._data)
+
+    @classmethod
+    def read(cls, f):
+        """Read a Ciphertext written by write()."""
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError("Ciphertext file is too short!")
+        magic, version, flags, width = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a ciphertext file, or an unsupported version!")
+        n = int.from_bytes(f.read(width), "big")
+        if rsa_stream.block_width(n) != width:
+            raise ValueError("Ciphertext file has a damaged header!")
+        return cls(n, bytearray(f.read()), bool(flags & PACKED))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            self.write(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.read(f)
@@ -1,6 +1,42 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import math
+import rsa_engine
+
+class ProgressPanel(ttk.Frame):
+    """Progress bar and Cancel button shown while background work runs."""
+    def __init__(self, parent, controller, action=None):
+        """action is the button that starts the work; it is disabled while shown."""
+        super().__init__(parent)
+        self.controller = controller
+        self.action = action
+        
+        self.bar = ttk.Progressbar(self, length=250, mode="indeterminate")
+        self.bar.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self, text="Cancel", command=controller.cancel_task).pack(side=tk.LEFT, padx=5)
+
+    def show(self):
+        """Display the panel with an indeterminate bar until progress arrives."""
+        self.bar.config(mode="indeterminate", value=0)
+        self.bar.start(10)
+        self.pack(pady=5)
+        if self.action:
+            self.action.state(["disabled"])
+
+    def update_progress(self, fraction):
+        """Show the completed fraction (0-1), or keep spinning if unknown."""
+        if fraction is None:
+            return
+        if str(self.bar.cget("mode")) != "determinate":
+            self.bar.stop()
+            self.bar.config(mode="determinate")
+        self.bar.config(value=fraction * 100)
+
+    def hide(self):
+        """Remove the panel once the work has finished or been cancelled."""
+        self.bar.stop()
+        self.pack_forget()
+        if self.action:
+            self.action.state(["!disabled"])
 
 class StartFrame(ttk.Frame):
     def __init__(self, parent, controller):
@@ -92,8 +128,24 @@ class PrimeFrame(ttk.Frame):
         self.q_entry = ttk.Entry(input_frame)
         self.q_entry.grid(row=1, column=1, padx=5)
         
-        validate_btn = ttk.Button(self, text="Validate Primes", command=self.validate)
-        validate_btn.pack(pady=10)
+        btn_frame = ttk.Frame(self)
+        btn_frame.pack(pady=10)
+        ttk.Button(btn_frame, text="Generate for me", command=self.generate).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Validate Primes", command=self.validate).pack(side=tk.LEFT, padx=5)
+
+    def generate(self):
+        """Fill in random primes for the selected difficulty."""
+        import keygen  # builds a sieve when imported; only needed once this is clicked
+        difficulty = self.controller.difficulty
+        if difficulty not in rsa_engine.DIFFICULTY_RANGES:
+            difficulty = 1
+        p = keygen.random_prime_for_difficulty(difficulty)
+        q = keygen.random_prime_for_difficulty(difficulty)
+        while q == p:
+            q = keygen.random_prime_for_difficulty(difficulty)
+        for entry, value in ((self.p_entry, p), (self.q_entry, q)):
+            entry.delete(0, tk.END)
+            entry.insert(0, str(value))
 
     def validate(self):
         """Validate the prime numbers entered by the user."""
@@ -121,7 +173,11 @@ class PrimeFrame(ttk.Frame):
 
     === Why Primes? ===
     - Primes ensure n is hard to factorize.
-    - Larger primes increase security."""
+    - Larger primes increase security.
+
+    === Options ===
+    • Type p and q yourself, or
+    • Click Generate for me to fill in random primes."""
         self.controller.update_notes(notes)
 
 class KeyFrame(ttk.Frame):
@@ -152,6 +208,8 @@ class KeyFrame(ttk.Frame):
         
         generate_btn = ttk.Button(self, text="Generate Keys", command=self.generate)
         generate_btn.pack(pady=10)
+        
+        self.progress = ProgressPanel(self, controller, action=generate_btn)
 
     def update_display(self):
         """Update the display with the current values of p, q, n, and phi."""
@@ -160,8 +218,10 @@ class KeyFrame(ttk.Frame):
 
     def generate(self):
         """Generate the public and private keys."""
-        if self.controller.generate_keys(self.e_var.get()):
-            messagebox.showinfo("Success", f"Private key d = {self.controller.d}")
+        self.controller.generate_keys(
+            self.e_var.get(),
+            on_success=lambda: messagebox.showinfo("Success", f"Private key d = {self.controller.d}"),
+            panel=self.progress)
 
     def update_notes(self):
         """Update the notes panel with key generation instructions and RSA explanation."""
@@ -169,7 +229,7 @@ class KeyFrame(ttk.Frame):
         self.update_display()
         
         # Populate the dropdown with valid e values
-        valid_e = [e for e in [3, 5, 7, 11, 17, 257, 65537] if math.gcd(e, self.controller.phi) == 1]
+        valid_e = rsa_engine.valid_exponents(self.controller.phi)
         self.e_menu['values'] = valid_e
         if valid_e:
             self.e_menu.current(0)  # Set the first valid e as the default selection
@@ -214,16 +274,39 @@ class EncryptFrame(ttk.Frame):
         self.message_entry = ttk.Entry(input_frame, width=40)
         self.message_entry.pack()
         
+        self.packed_var = tk.BooleanVar(value=False)
+        self.packed_check = ttk.Checkbutton(
+            input_frame, text="Pack bytes into blocks (fewer blocks, any characters)",
+            variable=self.packed_var)
+        self.packed_check.pack(pady=5)
+        
         encrypt_btn = ttk.Button(self, text="Encrypt", command=self.encrypt)
         encrypt_btn.pack(pady=10)
+        
+        self.progress = ProgressPanel(self, controller, action=encrypt_btn)
+
+    def on_show(self):
+        """Offer packed mode only when it helps for this round's n."""
+        # Blocks under 8 bits hold less than a byte each, so packing would
+        # produce more blocks than encrypting one character at a time
+        if rsa_engine.packing_shape(max(self.controller.n, 2))[0] < 8:
+            self.packed_var.set(False)
+            self.packed_check.state(["disabled"])
+        else:
+            self.packed_check.state(["!disabled"])
 
     def encrypt(self):
         """Encrypt the message using the public key."""
         message = self.message_entry.get()
 
         if message:
-            if self.controller.encrypt_message(message):
-                messagebox.showinfo("Encrypted", f"Encrypted message: {' '.join(map(str, self.controller.encrypted))}")
+            self.controller.packed = self.packed_var.get()
+            self.controller.encrypt_message(message, on_success=self.show_encrypted,
+                                            panel=self.progress)
+
+    def show_encrypted(self):
+        """Show the ciphertext once encryption has finished."""
+        messagebox.showinfo("Encrypted", f"Encrypted message: {self.controller.encrypted.decimal()}")
 
     def update_notes(self):
         """Update the notes panel with encryption instructions and RSA explanation."""
@@ -241,8 +324,16 @@ class EncryptFrame(ttk.Frame):
     - Keeps numbers manageable.
     - Ensures reversibility with private key.
 
+    === Packed Mode ===
+    - Characters must be below n one at a time.
+    - Packed mode joins the message bytes into blocks just below n,
+      so fewer numbers are encrypted for larger keys.
+    - It is unavailable when blocks would be under 8 bits
+      (e.g. Easy keys), since that makes more blocks, not fewer.
+
     === Options ===
     • Enter text to encrypt.
+    • Tick packed mode for long or non-ASCII messages.
     • Click Encrypt when ready."""
         self.controller.update_notes(notes)
 
@@ -263,18 +354,24 @@ class DecryptFrame(ttk.Frame):
         
         decrypt_btn = ttk.Button(self, text="Decrypt", command=self.decrypt)
         decrypt_btn.pack(pady=10)
+        
+        self.progress = ProgressPanel(self, controller, action=decrypt_btn)
 
     def decrypt(self):
         """Decrypt the message using the private key."""
         try:
             d = int(self.d_entry.get())
-            decrypted = self.controller.decrypt_message(d)
-            if decrypted:
-                messagebox.showinfo("Decrypted", f"Decrypted message: {decrypted}")
-                self.controller.save_to_leaderboard()
-                self.controller.show_frame(LeaderboardFrame)
-        except:
+        except ValueError:
             messagebox.showerror("Error", "Invalid decryption!")
+            return
+        self.controller.decrypt_message(d, on_success=self.finish, panel=self.progress)
+
+    def finish(self, decrypted):
+        """Show the decrypted text, record the score and open the leaderboard."""
+        if decrypted:
+            messagebox.showinfo("Decrypted", f"Decrypted message: {decrypted}")
+            self.controller.save_to_leaderboard()
+            self.controller.show_frame(LeaderboardFrame)
 
     def update_notes(self):
         """Update the notes panel with decryption instructions and RSA explanation."""
@@ -298,6 +395,10 @@ class DecryptFrame(ttk.Frame):
         self.controller.update_notes(notes)
 
 class LeaderboardFrame(ttk.Frame):
+    REFRESH_MS = 3000  # how often to check for results from other windows
+    PAGE_SIZE = 10
+    ALL = "All difficulties"
+
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
@@ -305,6 +406,21 @@ class LeaderboardFrame(ttk.Frame):
         label = ttk.Label(self, text="Leaderboard", font=("Helvetica", 14))
         label.pack(pady=10)
         
+        self.result_label = ttk.Label(self, text="")
+        self.result_label.pack()
+        
+        view_frame = ttk.Frame(self)
+        view_frame.pack(pady=5)
+        self.difficulty_var = tk.StringVar(value=self.ALL)
+        difficulty_menu = ttk.Combobox(view_frame, textvariable=self.difficulty_var, state="readonly",
+                                       values=[self.ALL] + list(rsa_engine.DIFFICULTY_NAMES.values()))
+        difficulty_menu.pack(side=tk.LEFT, padx=5)
+        difficulty_menu.bind("<<ComboboxSelected>>", lambda event: self.change_page(1))
+        ttk.Button(view_frame, text="< Prev", command=lambda: self.change_page(self.page - 1)).pack(side=tk.LEFT)
+        self.page_label = ttk.Label(view_frame, text="")
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        ttk.Button(view_frame, text="Next >", command=lambda: self.change_page(self.page + 1)).pack(side=tk.LEFT)
+        
         self.leaderboard_text = tk.Text(self, height=10, width=50)
         self.leaderboard_text.pack(pady=10)
         
@@ -315,30 +431,102 @@ class LeaderboardFrame(ttk.Frame):
         ttk.Button(btn_frame, text="Main Menu", 
                  command=lambda: controller.show_frame(StartFrame)).pack(side=tk.LEFT, padx=5)
         
-        self.load_leaderboard()
-        self.start_periodic_refresh()
+        self.page = 1
+        self.lines = []  # rows currently shown in leaderboard_text
+        self.shown_view = None  # (store version, difficulty, page) those rows came from
+        self.refresh_id = None
+        controller.leaderboard.subscribe(self.on_leaderboard_changed)
         
+    def on_show(self):
+        """Display the leaderboard and watch for changes while visible."""
+        self.load_leaderboard()
+        if self.refresh_id is None:
+            self.refresh_id = self.after(self.REFRESH_MS, self.check_for_changes)
+
+    def on_hide(self):
+        """Stop watching for changes while another frame is shown."""
+        if self.refresh_id is not None:
+            self.after_cancel(self.refresh_id)
+            self.refresh_id = None
+
+    def check_for_changes(self):
+        """Pick up results saved by other game windows (a stat() when idle)."""
+        self.refresh_id = None
+        if self.controller.current_frame is not self:
+            return
+        try:
+            self.controller.leaderboard.refresh_if_changed()
+        except OSError as e:
+            messagebox.showerror("Error", f"Leaderboard error: {str(e)}")
+            return
+        self.refresh_id = self.after(self.REFRESH_MS, self.check_for_changes)
+
+    def on_leaderboard_changed(self):
+        """Redraw right away when results arrive, but only if visible."""
+        if self.controller.current_frame is self:
+            self.load_leaderboard()
+
+    def selected_difficulty(self):
+        """Difficulty name chosen in the view, or None for all."""
+        choice = self.difficulty_var.get()
+        return None if choice == self.ALL else choice
+
+    def change_page(self, page):
+        """Show another page (or the first page of another difficulty)."""
+        pages = self.controller.leaderboard.page_count(self.selected_difficulty(), self.PAGE_SIZE)
+        self.page = min(max(1, page), pages)
+        self.load_leaderboard()
+
     def load_leaderboard(self):
         """Load and display leaderboard entries."""
         try:
-            leaderboard = self.controller.load_leaderboard()
-            self.leaderboard_text.delete(1.0, tk.END)
+            difficulty = self.selected_difficulty()
+            view = (self.controller.leaderboard.version, difficulty, self.page)
+            if view == self.shown_view:
+                return
+            leaderboard = self.controller.load_leaderboard(difficulty, self.page, self.PAGE_SIZE)
+            pages = self.controller.leaderboard.page_count(difficulty, self.PAGE_SIZE)
+            self.page_label.config(text=f"Page {self.page} of {pages}")
             
             if not leaderboard:
-                self.leaderboard_text.insert(tk.END, "No scores yet. Play a game to see your score here!")
+                lines = ["No scores yet. Play a game to see your score here!"]
             else:
-                for idx, entry in enumerate(leaderboard[:10], 1):
+                lines = []
+                first = (self.page - 1) * self.PAGE_SIZE + 1
+                for idx, entry in enumerate(leaderboard, first):
                     # Handle missing 'difficulty' key
                     difficulty = entry.get("difficulty", "Unknown")
-                    self.leaderboard_text.insert(tk.END, 
-                        f"{idx}. {entry['name']}: {entry['time']:.2f}s ({difficulty})\n")
+                    lines.append(f"{idx}. {entry['name']}: {entry['time']:.2f}s ({difficulty})")
+            self.show_lines(lines)
+            self.show_last_result()
+            self.shown_view = view
         except Exception as e:
             messagebox.showerror("Error", f"Leaderboard error: {str(e)}")
 
-    def start_periodic_refresh(self):
-        """Start periodic refresh of the leaderboard."""
-        self.load_leaderboard()
-        self.after(3000, self.start_periodic_refresh)  # Refresh every 3 seconds
+    def show_last_result(self):
+        """Tell the player how their last run compares with other players."""
+        result = self.controller.last_result
+        if not result:
+            self.result_label.config(text="")
+            return
+        difficulty = result["difficulty"]
+        percentile = self.controller.leaderboard.percentile(result["time"], difficulty, result["name"])
+        self.result_label.config(
+            text=f"{result['name']}, your {result['time']:.2f}s beat {percentile:.0f}% of {difficulty} players")
+
+    def show_lines(self, lines):
+        """Rewrite only the rows of the text widget that changed."""
+        text = self.leaderboard_text
+        for row, line in enumerate(lines, 1):
+            if row <= len(self.lines):
+                if self.lines[row - 1] != line:
+                    text.delete(f"{row}.0", f"{row}.end")
+                    text.insert(f"{row}.0", line)
+            else:
+                text.insert(tk.END, ("\n" if row > 1 else "") + line)
+        if len(lines) < len(self.lines):
+            text.delete(f"{len(lines)}.end", tk.END)
+        self.lines = lines
 
     def update_notes(self):
         """Update notes panel with leaderboard help and RSA summary."""
@@ -356,11 +544,12 @@ class LeaderboardFrame(ttk.Frame):
     - m = c^d mod n.
 
     === Leaderboard ===
-    Scores sorted by:
-    1. Completion time.
-    2. Difficulty level.
+    Scores are ranked by completion time,
+    either for one difficulty level or across all of them.
 
     === Options ===
+    • Choose a difficulty to see its ranking.
+    • Prev / Next: Browse more results.
     • Play Again: Restart game.
     • Main Menu: Return to start."""
-        self.controller.update_notes(notes)
\ No newline at end of file
+        self.controller.update_notes(notes)
\ No newline at end of file
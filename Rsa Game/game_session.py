@@ -0,0 +1,226 @@
+"""Game state and round logic without any UI.
+
+GameSession holds one player's rounds: the chosen primes and keys, the
+ciphertext, stage timing and the leaderboard. RSAGameApp adds the Tk
+frames on top of it, and the simulator drives it directly.
+
+The slow steps are split in two so they can run off the UI thread: a
+*_work method snapshots the state and returns a work(task) function, and
+the matching *_ready method records its result. task may be a
+background.BackgroundTask or None.
+"""
+import os
+import time
+
+import background
+import ciphertext
+import instrumentation
+import leaderboard_client
+import parallel
+import rsa_engine
+
+
+class GameSession:
+    def __init__(self, leaderboard=None):
+        """leaderboard is a store; by default the configured one is opened on first use."""
+        self.player_name = ""
+        self.difficulty = 1
+        self.p = 0
+        self.q = 0
+        self.n = 0
+        self.phi = 0
+        self.e = 0
+        self.d = 0
+        self.key = None  # full rsa_engine.RSAKey for the current round
+        self.use_crt = True  # decrypt with the CRT parameters when d matches
+        self.packed = False  # per-character (teaching) mode unless packing is chosen
+        self.workers = None  # packed-mode worker processes (None = CPU count)
+        self.encrypted = ciphertext.Ciphertext(1)  # this round's ciphertext, compactly stored
+        self.start_time = 0
+        self.total_time = 0
+        self.stage_times = []  # Track time for each stage
+        self.instrumentation = instrumentation.Instrumentation()  # think/compute spans
+        self.timings_path = os.environ.get("RSA_TIMINGS_PATH")  # dump spans here after each round
+        self._leaderboard = leaderboard  # opened on first use, see the leaderboard property
+        self.last_result = None  # this session's most recent saved result
+
+    @property
+    def leaderboard(self):
+        """The leaderboard store, opened on first use since that reads the log."""
+        if self._leaderboard is None:
+            self._leaderboard = leaderboard_client.open_store()
+        return self._leaderboard
+
+    def start_round(self):
+        """Reset the timers for a new round."""
+        self.start_time = time.perf_counter()
+        self.total_time = 0
+        self.stage_times = []
+        self.instrumentation.new_round()
+        self.instrumentation.start_thinking("primes")
+
+    def _end_stage(self, next_stage):
+        """Record the finished stage's time; next_stage None ends the round.
+
+        Returns dump_timings' error, if any, when the round ends.
+        """
+        now = time.perf_counter()
+        self.stage_times.append(now - self.start_time)
+        self.start_time = now
+        if next_stage:
+            self.instrumentation.start_thinking(next_stage)
+            return
+        self.total_time = sum(self.stage_times)
+        if self.timings_path:
+            return self.dump_timings(self.timings_path)
+        return None
+
+    def retry_stage(self, stage):
+        """Give the turn back to the player after a failed submission."""
+        self.instrumentation.start_thinking(stage)
+
+    def check_primes(self, p, q):
+        """Accept p and q for the round, or return the error to show."""
+        self.instrumentation.stop_thinking()
+        with self.instrumentation.span("primality", stage="primes"):
+            error = rsa_engine.validate_primes(p, q, self.difficulty)
+        if error:
+            self.retry_stage("primes")
+            return error
+        self.p = p
+        self.q = q
+        self.n = p * q
+        self.phi = (p-1) * (q-1)
+        self._end_stage("keys")
+        return None
+
+    def _process_blocks(self, task, blocks, exponent, modulus, chunk_func):
+        """Run chunk_func over blocks, in a process pool when it pays off.
+
+        chunk_func(chunk, **options) takes parallel.* keyword options.
+        """
+        if parallel.use_serial(blocks, exponent, modulus, self.workers,
+                               parallel.MIN_PARALLEL_WORK):
+            return background.run_chunked(task, lambda chunk: chunk_func(chunk, workers=1), blocks)
+        from concurrent.futures import ProcessPoolExecutor
+        workers = self.workers or os.cpu_count()
+        with ProcessPoolExecutor(workers) as pool:
+            return background.run_chunked(
+                task, lambda chunk: chunk_func(chunk, executor=pool), blocks,
+                background.DEFAULT_CHUNK_SIZE * workers)
+
+    def key_work(self, e):
+        """Work deriving the key for e; ends the player's turn. See keys_ready."""
+        p, q = self.p, self.q
+        timing = self.instrumentation
+        timing.stop_thinking()
+
+        def work(task):
+            with timing.span("inverse", stage="keys", bits=(p * q).bit_length()):
+                return rsa_engine.generate_keys(p, q, e)
+        return work
+
+    def keys_ready(self, key):
+        self.key = key
+        self.e = key.e
+        self.d = key.d
+        self._end_stage("encrypt")
+
+    def encrypt_work(self, message):
+        """Work encrypting message with the public key. See encrypted_ready."""
+        e, n, packed = self.e, self.n, self.packed
+        timing = self.instrumentation
+        timing.stop_thinking()
+
+        def work(task):
+            if not packed:
+                with timing.span("exponentiation", stage="encrypt", blocks=len(message)):
+                    encrypted = background.run_chunked(
+                        task, lambda chunk: rsa_engine.encrypt(chunk, e, n), message)
+            else:
+                with timing.span("pack", stage="encrypt"):
+                    blocks = rsa_engine.pack_bytes(message.encode("utf-8"), n)
+                with timing.span("exponentiation", stage="encrypt", blocks=len(blocks)):
+                    encrypted = self._process_blocks(
+                        task, blocks, e, n,
+                        lambda chunk, **options: parallel.encrypt_blocks(chunk, e, n, **options))
+            return ciphertext.Ciphertext.from_blocks(encrypted, n, packed)
+        return work
+
+    def encrypted_ready(self, encrypted):
+        self.encrypted = encrypted
+        self._end_stage("decrypt")
+
+    def decrypt_work(self, d):
+        """Work decrypting the ciphertext with d; returns the text. See decrypted_ready."""
+        key, n, packed, encrypted = self.key, self.n, self.packed, self.encrypted
+        use_crt = self.use_crt and key is not None and d == key.d
+        timing = self.instrumentation
+        timing.stop_thinking()
+
+        def work(task):
+            with timing.span("exponentiation", stage="decrypt", blocks=len(encrypted),
+                             crt=use_crt):
+                if not packed:
+                    # Per-character blocks go through rsa_engine's lookup tables
+                    if use_crt:
+                        chars = background.run_chunked(
+                            task, lambda chunk: rsa_engine.decrypt_with_key(chunk, key), encrypted)
+                    else:
+                        chars = background.run_chunked(
+                            task, lambda chunk: rsa_engine.decrypt(chunk, d, n), encrypted)
+                    return ''.join(chars)
+                if use_crt:
+                    blocks = self._process_blocks(
+                        task, encrypted, d, n,
+                        lambda chunk, **options: parallel.decrypt_blocks(chunk, key, **options))
+                else:
+                    blocks = background.run_chunked(
+                        task, lambda chunk: [pow(c, d, n) for c in chunk], encrypted)
+            with timing.span("unpack", stage="decrypt"):
+                return rsa_engine.unpack_blocks(blocks, n).decode("utf-8")
+        return work
+
+    def decrypted_ready(self):
+        """Finish the round; total_time is its score.
+
+        Returns the error to show if the timings could not be written.
+        """
+        return self._end_stage(None)
+
+    def dump_timings(self, path):
+        """Write this session's think and compute spans to path as JSON.
+
+        Returns None on success, otherwise the error message to show.
+        """
+        try:
+            self.instrumentation.dump(path)
+        except OSError as err:
+            return f"Could not write timings to {path}: {err}"
+        return None
+
+    def save_to_leaderboard(self):
+        """Save the player's score to the leaderboard."""
+        self.last_result = {
+            "name": self.player_name,
+            "time": self.total_time,
+            "difficulty": rsa_engine.DIFFICULTY_NAMES.get(self.difficulty, "Unknown")
+        }
+        self.leaderboard.add(self.last_result)
+
+    def load_leaderboard(self, difficulty=None, page=1, page_size=10):
+        """Return one page of results for a difficulty (None = all), best first."""
+        return self.leaderboard.ranking(difficulty, page, page_size)
+
+    # Core RSA functions (implemented in rsa_engine)
+    def is_prime(self, num):
+        """Primality test: sieve lookup for game-sized numbers, deterministic above that."""
+        return rsa_engine.is_prime(num)
+
+    def mod_inverse(self, e, phi):
+        """Extended Euclidean Algorithm for modular inverse."""
+        return rsa_engine.mod_inverse(e, phi)
+
+    def extended_gcd(self, a, b):
+        """Extended Euclidean Algorithm."""
+        return rsa_engine.extended_gcd(a, b)
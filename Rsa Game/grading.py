@@ -0,0 +1,195 @@
+"""Batch grading of hand-computed RSA answers.
+
+A submission is a dict with the student's p, q, e, d, ciphertext (a list
+of blocks) and claimed plaintext, plus optional "id", "difficulty" (1-3
+or a name such as "Easy") and "packed" fields. Each one is checked for
+
+    primes      p and q are prime
+    range       both fit the difficulty's range (None when not given)
+    exponent    1 < e < phi and gcd(e, phi) = 1
+    inverse     e * d = 1 mod phi
+    round_trip  encrypting the plaintext gives the ciphertext, and
+                decrypting the ciphertext with d gives the plaintext
+
+and gets a result dict {"id", "ok", "checks": {name: True/False/None},
+"errors": [...]}; a check is None when an earlier failure made it
+meaningless. A submission that cannot be graded at all fails on its own
+without affecting the rest of its batch. grade_batch grades a batch
+concurrently across a process pool. From the command line, submissions
+are read as JSON lines:
+
+    python grading.py submissions.jsonl [--workers N] > results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+
+import rsa_engine
+
+CHECKS = ["primes", "range", "exponent", "inverse", "round_trip"]
+FIELDS = ["p", "q", "e", "d"]
+CHUNK_SIZE = 32  # submissions per pool task
+LEVELS = {name.lower(): level for level, name in rsa_engine.DIFFICULTY_NAMES.items()}
+
+
+def _difficulty(value):
+    """Difficulty level from 1-3 or a name, None if not given."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        if value.lower() not in LEVELS:
+            raise ValueError(f"unknown difficulty {value!r}")
+        return LEVELS[value.lower()]
+    if isinstance(value, bool) or value not in rsa_engine.DIFFICULTY_RANGES:
+        raise ValueError(f"unknown difficulty {value!r}")
+    return value
+
+
+def _round_trip(item, e, d, n):
+    """Error message for the ciphertext/plaintext pair, or None if it checks out."""
+    ciphertext, plaintext = item.get("ciphertext"), item.get("plaintext")
+    if not isinstance(ciphertext, list) or not all(type(c) is int for c in ciphertext):
+        return "ciphertext must be a list of integers"
+    if not all(0 <= c < n for c in ciphertext):
+        return f"ciphertext blocks must be between 0 and n - 1 = {n - 1}"
+    if not isinstance(plaintext, str):
+        return "plaintext must be a string"
+    try:
+        if item.get("packed"):
+            expected = rsa_engine.encrypt_packed(plaintext, e, n)
+            decrypted = rsa_engine.decrypt_packed(ciphertext, d, n)
+        else:
+            expected = rsa_engine.encrypt(plaintext, e, n)
+            decrypted = rsa_engine.decrypt(ciphertext, d, n)
+    except (ValueError, UnicodeDecodeError) as err:
+        return f"round trip failed: {err}"
+    if expected != ciphertext:
+        return "ciphertext is not the encryption of the plaintext"
+    if decrypted != plaintext:
+        return "decrypting the ciphertext with d does not give the plaintext"
+    return None
+
+
+def _failed(item):
+    """A result dict for item with every check still unknown."""
+    return {"id": item.get("id") if isinstance(item, dict) else None,
+            "ok": False, "checks": dict.fromkeys(CHECKS), "errors": []}
+
+
+def grade_submission(item):
+    """Check one submission; returns its result dict."""
+    result = _failed(item)
+    checks, errors = result["checks"], result["errors"]
+    if not isinstance(item, dict):
+        errors.append("submission must be an object")
+        return result
+    missing = [f for f in FIELDS if type(item.get(f)) is not int]
+    if missing:
+        errors.append("p, q, e and d must be integers: " + ", ".join(missing))
+        return result
+    p, q, e, d = (item[f] for f in FIELDS)
+    try:
+        difficulty = _difficulty(item.get("difficulty"))
+    except ValueError as err:
+        errors.append(str(err))
+        return result
+
+    checks["primes"] = rsa_engine.validate_primes(p, q) is None
+    if not checks["primes"]:
+        errors.append("p and q must both be prime")
+        return result
+    if difficulty is not None:
+        error = rsa_engine.validate_primes(p, q, difficulty)
+        checks["range"] = error is None
+        if error:
+            errors.append(error)
+
+    n, phi = p * q, (p - 1) * (q - 1)
+    checks["exponent"] = 1 < e < phi and math.gcd(e, phi) == 1
+    if not checks["exponent"]:
+        errors.append(f"e must be between 1 and phi = {phi} and coprime with it")
+    else:
+        checks["inverse"] = d > 0 and e * d % phi == 1
+        if not checks["inverse"]:
+            errors.append(f"d is not a positive inverse of e modulo phi = {phi}")
+
+    if checks["exponent"] and checks["inverse"]:
+        error = _round_trip(item, e, d, n)
+        checks["round_trip"] = error is None
+        if error:
+            errors.append(error)
+    result["ok"] = not errors
+    return result
+
+
+def grade_chunk(items):
+    """Grade submissions in order; an unexpected error fails only its own item."""
+    results = []
+    for item in items:
+        try:
+            results.append(grade_submission(item))
+        except Exception as err:
+            result = _failed(item)
+            result["errors"].append(f"could not grade submission: {type(err).__name__}: {err}")
+            results.append(result)
+    return results
+
+
+async def grade_batch(items, executor=None, workers=None):
+    """Grade submissions concurrently; results come back in input order.
+
+    Chunks of CHUNK_SIZE run on executor, or on a process pool of workers
+    (default: CPU count) created for this call.
+    """
+    items = list(items)
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    if not chunks:
+        return []
+    loop = asyncio.get_running_loop()
+    if executor is not None:
+        results = await asyncio.gather(*(loop.run_in_executor(executor, grade_chunk, chunk)
+                                         for chunk in chunks))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(workers) as pool:
+            results = await asyncio.gather(*(loop.run_in_executor(pool, grade_chunk, chunk)
+                                             for chunk in chunks))
+    return [result for chunk in results for result in chunk]
+
+
+def grade_all(items, workers=None):
+    """Blocking wrapper around grade_batch."""
+    return asyncio.run(grade_batch(items, workers=workers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade RSA submissions given as JSON lines.")
+    parser.add_argument("input", help="submissions file, or - for stdin")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    with source:
+        items = []
+        invalid = {}  # item index -> line number of lines that are not JSON
+        for number, line in enumerate(source, 1):
+            if line.strip():
+                try:
+                    items.append(json.loads(line))
+                except json.JSONDecodeError:
+                    invalid[len(items)] = number
+                    items.append(None)
+    results = grade_all(items, args.workers)
+    for index, number in invalid.items():
+        results[index].update(id=f"line {number}", errors=["not valid JSON"])
+    for result in results:
+        print(json.dumps(result))
+    passed = sum(result["ok"] for result in results)
+    print(f"{passed}/{len(results)} submissions passed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
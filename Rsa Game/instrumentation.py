@@ -0,0 +1,109 @@
+"""Timing spans for a game session.
+
+Each span records where time went in one stage of a round, measured with
+time.perf_counter_ns:
+
+    think    the player reading and typing, from a stage being ready to
+             the player submitting it
+    compute  the program working: primality tests, the modular inverse,
+             packing and the modular exponentiations
+
+Hooks added with add_hook are called with every span as it is recorded,
+and dump() writes the whole session as JSON for analysis.
+"""
+import contextlib
+import json
+import threading
+import time
+
+THINK = "think"
+COMPUTE = "compute"
+
+
+class Instrumentation:
+    def __init__(self):
+        self.spans = []  # dicts with name, kind, start_ns, duration_ns and extra fields
+        self.round = 0
+        self._hooks = []
+        self._lock = threading.Lock()  # compute spans are recorded from worker threads
+        self._thinking = None  # (stage, start_ns) while waiting for the player
+
+    def add_hook(self, callback):
+        """Call callback(span) for every recorded span, on the recording thread."""
+        self._hooks.append(callback)
+
+    def remove_hook(self, callback):
+        if callback in self._hooks:
+            self._hooks.remove(callback)
+
+    def record(self, name, kind, start_ns, end_ns, **fields):
+        """Record a span and pass it to the hooks."""
+        span = {"name": name, "kind": kind, "round": self.round,
+                "start_ns": start_ns, "duration_ns": end_ns - start_ns}
+        span.update(fields)
+        with self._lock:
+            self.spans.append(span)
+        for callback in list(self._hooks):
+            callback(span)
+        return span
+
+    @contextlib.contextmanager
+    def span(self, name, kind=COMPUTE, **fields):
+        """Time the body of a with block as one span.
+
+        A span whose body raises is still recorded, with the exception's
+        type under "error".
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        except BaseException as err:
+            fields["error"] = type(err).__name__
+            raise
+        finally:
+            self.record(name, kind, start, time.perf_counter_ns(), **fields)
+
+    def new_round(self):
+        """Number the spans that follow as a new round."""
+        self._thinking = None
+        self.round += 1
+
+    def start_thinking(self, stage):
+        """Mark the start of the player's turn in a stage."""
+        self._thinking = (stage, time.perf_counter_ns())
+
+    def stop_thinking(self):
+        """Record the think span started by start_thinking, if any."""
+        if self._thinking is not None:
+            stage, start = self._thinking
+            self._thinking = None
+            self.record(stage, THINK, start, time.perf_counter_ns(), stage=stage)
+
+    def totals(self, round=None):
+        """Nanoseconds per (kind, name), for one round or the whole session."""
+        result = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            if round is None or span["round"] == round:
+                key = (span["kind"], span["name"])
+                result[key] = result.get(key, 0) + span["duration_ns"]
+        return result
+
+    def to_dict(self):
+        with self._lock:
+            spans = list(self.spans)
+        totals = {}
+        for (kind, name), ns in self.totals().items():
+            totals.setdefault(kind, {})[name] = ns
+        return {"clock": "perf_counter_ns", "spans": spans, "totals_ns": totals}
+
+    def dump(self, path):
+        """Write every span and the per-kind totals to path as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+        self._thinking = None
@@ -0,0 +1,95 @@
+"""Random prime and key generation.
+
+Large primes are found by incremental search from a random odd start: a
+window of candidates is sieved by the small primes first, and only the
+survivors go through rsa_engine.is_prime. Game-sized primes are drawn
+directly from the prime index.
+"""
+import math
+import secrets
+
+import prime_index
+import rsa_engine
+
+# Odd primes used to sieve candidate windows before the full test
+SIEVE_PRIMES = prime_index.PrimeIndex(2000).primes[1:]
+WINDOW = 1024  # odd candidates sieved at a time
+MIN_KEY_BITS = 16  # smaller moduli leave too few distinct primes to pick from
+
+_system_random = secrets.SystemRandom()
+
+
+def _sieve_window(start):
+    """Flags for the odd candidates start, start + 2, ...; 0 = has a small factor."""
+    flags = bytearray([1]) * WINDOW
+    for sp in SIEVE_PRIMES:
+        # First i with start + 2*i divisible by sp
+        first = (-start * ((sp + 1) // 2)) % sp
+        flags[first::sp] = bytes(len(range(first, WINDOW, sp)))
+    return flags
+
+
+def next_prime(start):
+    """Smallest prime >= start, found with a sieved incremental search."""
+    if start <= prime_index.DEFAULT_LIMIT:
+        try:
+            return prime_index.default_index().nth_prime(0, start)
+        except IndexError:
+            start = prime_index.DEFAULT_LIMIT + 1
+    start |= 1
+    while True:
+        flags = _sieve_window(start)
+        for i, flag in enumerate(flags):
+            if flag and rsa_engine.is_prime(start + 2 * i):
+                return start + 2 * i
+        start += 2 * WINDOW
+
+
+def random_prime(bits, rng=None):
+    """Random prime of exactly the given bit length.
+
+    The top two bits are set so the product of two such primes has exactly
+    2 * bits bits. rng defaults to a cryptographically secure source.
+    """
+    if bits < 4:
+        raise ValueError("bits must be at least 4")
+    rng = rng or _system_random
+    while True:
+        start = rng.getrandbits(bits) | (3 << (bits - 2)) | 1
+        prime = next_prime(start)
+        if prime.bit_length() == bits:
+            return prime
+
+
+def random_prime_for_difficulty(difficulty, rng=None):
+    """Random prime in the range allowed for a game difficulty."""
+    return (rng or _system_random).choice(rsa_engine.band_primes(difficulty))
+
+
+def generate_keypair(bits, e=65537, rng=None):
+    """Random RSAKey with a modulus of exactly the given bit length.
+
+    Raises ValueError if bits is below MIN_KEY_BITS.
+    """
+    if bits < MIN_KEY_BITS:
+        raise ValueError(f"key size must be at least {MIN_KEY_BITS} bits")
+    rng = rng or _system_random
+    half = bits // 2
+    while True:
+        p = random_prime(bits - half, rng)
+        q = random_prime(half, rng)
+        if p != q and math.gcd(e, (p - 1) * (q - 1)) == 1:
+            # Random keys never repeat, so keep them out of the round cache
+            return rsa_engine.generate_keys.__wrapped__(p, q, e)
+
+
+def generate_practice_round(difficulty, rng=None):
+    """Random (p, q, e) suitable for a game round at the given difficulty."""
+    rng = rng or _system_random
+    while True:
+        p = random_prime_for_difficulty(difficulty, rng)
+        q = random_prime_for_difficulty(difficulty, rng)
+        phi = (p - 1) * (q - 1)
+        valid_e = rsa_engine.valid_exponents(phi)
+        if p != q and valid_e:
+            return p, q, rng.choice(valid_e)
@@ -0,0 +1,194 @@
+"""Client for the shared leaderboard service.
+
+RemoteStore has the same interface as leaderboard_store.JsonLinesStore, so
+the game can use either. If the server cannot be reached, results go to
+the local store instead and reads come from it, without touching the
+network, until refresh_if_changed finds the server answering again.
+
+Results saved while offline are also queued in a pending file next to the
+local log (<log>.pending), which survives restarts. refresh_if_changed
+sends the queue with POST /results before anything else, so results from
+an outage reach the shared board once the server is back.
+"""
+import json
+import os
+from urllib.parse import urlencode
+
+import leaderboard_store
+
+TIMEOUT = 2.0  # seconds; the game calls this from the Tk thread
+
+
+def open_store(url=None, path=None):
+    """The configured leaderboard store.
+
+    A RemoteStore when a server URL is given or RSA_LEADERBOARD_URL is set,
+    otherwise the local JSON-lines store.
+    """
+    url = url or os.environ.get("RSA_LEADERBOARD_URL")
+    local = leaderboard_store.JsonLinesStore(path)
+    return RemoteStore(url, local) if url else local
+
+
+class RemoteStore:
+    def __init__(self, url, fallback, timeout=TIMEOUT):
+        self.url = url.rstrip("/")
+        self.fallback = fallback
+        self.timeout = timeout
+        self.version = 0
+        self.count = 0
+        self.online = True
+        self._remote_version = None
+        self._pages = (None, None)  # ((difficulty, page_size, version), pages) of the last /ranking
+        self.pending_path = fallback.path + ".pending"  # results not yet sent, as JSON lines
+        self._listeners = []
+
+    def _request(self, path, payload=None):
+        import urllib.request  # slow to import; only needed once a server is configured
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def _changed(self):
+        self.version += 1
+        for callback in list(self._listeners):
+            callback()
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add(self, entry):
+        self.add_many([entry])
+
+    def add_many(self, entries):
+        """Send results to the server, or keep them locally while it is down."""
+        entries = list(entries)
+        if self.online:
+            try:
+                self._request("/results", entries)
+            except (OSError, ValueError):
+                self.online = False
+            else:
+                self.refresh_if_changed()
+                return
+        self.fallback.add_many(entries)
+        self._queue(entries)
+        self.count = self.fallback.count
+        self._changed()
+
+    def _queue(self, entries):
+        """Append results to the pending file, in one write."""
+        data = "".join(json.dumps(entry) + "\n" for entry in entries)
+        if data:
+            with open(self.pending_path, "a", encoding="utf-8") as f:
+                f.write(data)
+
+    def send_pending(self):
+        """Send results queued while offline; returns how many were sent.
+
+        The pending file is renamed before sending, so another game window
+        sharing it cannot send the same results twice. If the request
+        fails, the results are queued again and the error is raised.
+        """
+        claimed = f"{self.pending_path}.{os.getpid()}"
+        try:
+            os.replace(self.pending_path, claimed)
+        except FileNotFoundError:
+            return 0
+        entries = []
+        with open(claimed, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # e.g. a line cut short by a crash
+        try:
+            if entries:
+                self._request("/results", entries)
+        except (OSError, ValueError):
+            self._queue(entries)
+            raise
+        finally:
+            os.remove(claimed)
+        return len(entries)
+
+    def refresh_if_changed(self):
+        """Check the server's version; True if the results changed.
+
+        This is the only call that contacts the server while it is marked
+        offline, so the game retries it once per refresh, not once per read.
+        Queued offline results are sent first.
+        """
+        try:
+            self.send_pending()
+            status = self._request("/version")
+            online = True
+        except (OSError, ValueError):
+            status = None
+            online = False
+        changed = online != self.online
+        self.online = online
+        if status is not None:
+            changed = changed or status["version"] != self._remote_version
+            self._remote_version = status["version"]
+            self.count = status["count"]
+        else:
+            changed = self.fallback.refresh_if_changed() or changed
+            self.count = self.fallback.count
+        if changed:
+            self._changed()
+        return changed
+
+    def _read(self, path, local, **params):
+        """GET path from the server, or return local() while it is offline."""
+        if self.online:
+            query = urlencode({k: v for k, v in params.items() if v is not None})
+            try:
+                return self._request(path + ("?" + query if query else ""))
+            except (OSError, ValueError):
+                self.online = False
+        return local()
+
+    def _ranking(self, difficulty, page, page_size):
+        """The /ranking response, remembering the server's page count."""
+        response = self._read("/ranking", lambda: None, difficulty=difficulty, page=page,
+                              page_size=page_size)
+        if response is not None:
+            self._pages = ((difficulty, page_size, self._remote_version), response["pages"])
+        return response
+
+    def top(self, difficulty=None, limit=None):
+        """Fastest results from the server, or from the local store."""
+        return self._read("/top", lambda: self.fallback.top(difficulty, limit),
+                          difficulty=difficulty, limit=limit)
+
+    def ranking(self, difficulty=None, page=1, page_size=10):
+        response = self._ranking(difficulty, page, page_size)
+        if response is None:
+            return self.fallback.ranking(difficulty, page, page_size)
+        return response["results"]
+
+    def page_count(self, difficulty=None, page_size=10):
+        """Pages for a view; no request right after ranking() for the same view."""
+        view, pages = self._pages
+        if self.online and view == (difficulty, page_size, self._remote_version):
+            return pages
+        response = self._ranking(difficulty, 1, page_size)
+        if response is None:
+            return self.fallback.page_count(difficulty, page_size)
+        return response["pages"]
+
+    def player_best(self, name, difficulty=None):
+        return self._read("/player", lambda: self.fallback.player_best(name, difficulty),
+                          name=name, difficulty=difficulty)
+
+    def percentile(self, time, difficulty=None, name=None):
+        local = lambda: {"percentile": self.fallback.percentile(time, difficulty, name)}
+        return self._read("/percentile", local, time=time, difficulty=difficulty,
+                          name=name)["percentile"]
@@ -0,0 +1,109 @@
+"""Indexed leaderboard queries.
+
+Every result is kept in lists sorted by time, one per difficulty plus one
+overall, and each player's best time is tracked alongside. Rankings,
+pages and percentiles are then slices and binary searches, so queries do
+not re-sort anything however many results are stored.
+"""
+import itertools
+from bisect import bisect_left, bisect_right, insort
+
+ALL = None  # difficulty key for the overall ranking
+BULK_THRESHOLD = 64  # batches at least this big are appended and re-sorted
+
+
+class LeaderboardIndex:
+    def __init__(self):
+        self._seq = itertools.count()
+        # difficulty -> [(time, seq, entry)] sorted fastest first
+        self._results = {ALL: []}
+        # (name, difficulty) -> (time, seq, entry) of the player's best result
+        self._best = {}
+        # difficulty -> sorted best times, one per player
+        self._player_times = {ALL: []}
+
+    def __len__(self):
+        return len(self._results[ALL])
+
+    def add(self, entry):
+        """Index one result (a dict with name, time and difficulty)."""
+        item = (entry["time"], next(self._seq), entry)
+        difficulty = entry.get("difficulty", "Unknown")
+        for key in (ALL, difficulty):
+            insort(self._results.setdefault(key, []), item)
+            self._update_best(entry.get("name", ""), key, item)
+
+    def add_many(self, entries):
+        """Index several results; large batches are sorted in one pass."""
+        if len(entries) < BULK_THRESHOLD:
+            for entry in entries:
+                self.add(entry)
+            return
+        touched = {ALL}
+        for entry in entries:
+            item = (entry["time"], next(self._seq), entry)
+            difficulty = entry.get("difficulty", "Unknown")
+            touched.add(difficulty)
+            for key in (ALL, difficulty):
+                self._results.setdefault(key, []).append(item)
+                name_key = (entry.get("name", ""), key)
+                best = self._best.get(name_key)
+                if best is None or item[:2] < best[:2]:
+                    self._best[name_key] = item
+        for key in touched:
+            self._results[key].sort()
+            self._player_times[key] = sorted(
+                item[0] for (_, k), item in self._best.items() if k == key)
+
+    def _update_best(self, name, difficulty, item):
+        times = self._player_times.setdefault(difficulty, [])
+        best = self._best.get((name, difficulty))
+        if best is not None:
+            if best[:2] <= item[:2]:
+                return
+            del times[bisect_left(times, best[0])]
+        self._best[(name, difficulty)] = item
+        insort(times, item[0])
+
+    def difficulties(self):
+        """Difficulties that have at least one result."""
+        return sorted(k for k in self._results if k is not ALL)
+
+    def count(self, difficulty=ALL):
+        return len(self._results.get(difficulty, []))
+
+    def page_count(self, difficulty=ALL, page_size=10):
+        return max(1, -(-self.count(difficulty) // page_size))
+
+    def ranking(self, difficulty=ALL, page=1, page_size=10):
+        """One page (1-based) of results for a difficulty, fastest first."""
+        start = (page - 1) * page_size
+        return [entry for _, _, entry in self._results.get(difficulty, [])[start:start + page_size]]
+
+    def player_best(self, name, difficulty=ALL):
+        """A player's fastest result for a difficulty (or overall), or None."""
+        best = self._best.get((name, difficulty))
+        return best[2] if best else None
+
+    def rank(self, time, difficulty=ALL):
+        """1-based position a result with this time holds among all results."""
+        return bisect_left(self._results.get(difficulty, []), (time,)) + 1
+
+    def percentile(self, time, difficulty=ALL, name=None):
+        """Percentage of players whose best time is slower than time.
+
+        e.g. 83.0 for "you beat 83% of Medium players". When name is given
+        that player's own best is left out of the comparison. Returns 100.0
+        if there is nobody to compare with.
+        """
+        times = self._player_times.get(difficulty, [])
+        slower = len(times) - bisect_right(times, time)
+        others = len(times)
+        own = self._best.get((name, difficulty)) if name is not None else None
+        if own is not None:
+            others -= 1
+            if own[0] > time:
+                slower -= 1
+        if others <= 0:
+            return 100.0
+        return 100.0 * slower / others
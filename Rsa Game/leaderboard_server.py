@@ -0,0 +1,220 @@
+"""Shared leaderboard service for multi-seat labs.
+
+A small asyncio HTTP server in front of a JsonLinesStore, so every game
+window in a lab records results in one place:
+
+    POST /results                 body: one result object or a list of them
+    GET  /top?difficulty=&limit=  fastest results, best first
+    GET  /ranking?difficulty=&page=&page_size=
+                                  {"results": [...], "pages": n}
+    GET  /player?name=&difficulty=
+                                  the player's best result, or null
+    GET  /percentile?time=&difficulty=&name=
+                                  {"percentile": x}
+    GET  /version                 {"version": n, "count": n} for change checks
+    POST /grade                   body: a list of submissions (see grading.py)
+                                  {"results": [...], "passed": n}
+
+Submissions are queued and written in batches (one append per batch); each
+request is answered once its batch is on disk. Run it with
+
+    python leaderboard_server.py --port 8765
+
+and start the games with RSA_LEADERBOARD_URL=http://<host>:8765.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import parse_qs, urlsplit
+
+import grading
+import leaderboard_store
+
+BATCH_SIZE = 500  # most results written per append
+BATCH_DELAY = 0.02  # seconds to wait for more results before writing
+MAX_BODY = 1 << 20
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def valid_entry(entry):
+    """True for a result object with a name, a finite time and a difficulty."""
+    return (isinstance(entry, dict)
+            and isinstance(entry.get("name"), str)
+            and leaderboard_store.valid_time(entry.get("time"))
+            and isinstance(entry.get("difficulty", ""), str))
+
+
+class LeaderboardServer:
+    def __init__(self, store, batch_size=BATCH_SIZE, batch_delay=BATCH_DELAY):
+        self.store = store
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.server = None
+        self._queue = None
+        self._writer_task = None
+        self._grading_pool = None  # process pool, started by the first /grade request
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start listening; port 0 picks a free port (see self.port)."""
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_batches())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self._writer_task.cancel()
+        if self._grading_pool is not None:
+            self._grading_pool.shutdown(cancel_futures=True)
+
+    async def submit(self, entries):
+        """Queue results and wait until their batch has been written."""
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((entries, done))
+        await done
+
+    async def _write_batches(self):
+        while True:
+            pending = [await self._queue.get()]
+            count = len(pending[0][0])
+            deadline = asyncio.get_running_loop().time() + self.batch_delay
+            while count < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                count += len(item[0])
+            entries = [entry for batch, _ in pending for entry in batch]
+            try:
+                # A batch append is short, and doing it on the loop keeps the
+                # in-memory index single-threaded
+                self.store.add_many(entries)
+            except Exception as err:
+                for _, done in pending:
+                    done.set_exception(err)
+            else:
+                for _, done in pending:
+                    done.set_result(None)
+
+    async def _handle(self, reader, writer):
+        try:
+            status, payload = await self._respond(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        except Exception as err:
+            status, payload = 500, {"error": str(err)}
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                     "Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     "Connection: close\r\n\r\n".encode("ascii") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _respond(self, reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            return 413, {"error": "request body too large"}
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/grade":
+            return await self._grade(method, body)
+        if url.path == "/results":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return 400, {"error": "body is not JSON"}
+            entries = data if isinstance(data, list) else [data]
+            if not entries or not all(valid_entry(e) for e in entries):
+                return 400, {"error": "results need a name, a numeric time and a difficulty"}
+            await self.submit(entries)
+            return 200, {"saved": len(entries), "version": self.store.version}
+        if method != "GET":
+            return 405, {"error": "use GET"}
+        difficulty = query.get("difficulty") or None
+        try:
+            if url.path == "/top":
+                limit = int(query["limit"]) if "limit" in query else None
+                return 200, self.store.top(difficulty, limit)
+            if url.path == "/ranking":
+                page = max(1, int(query.get("page", 1)))
+                page_size = max(1, int(query.get("page_size", 10)))
+                return 200, {"results": self.store.ranking(difficulty, page, page_size),
+                             "pages": self.store.page_count(difficulty, page_size)}
+            if url.path == "/percentile":
+                percentile = self.store.percentile(float(query["time"]), difficulty,
+                                                   query.get("name"))
+                return 200, {"percentile": percentile}
+        except (KeyError, ValueError):
+            return 400, {"error": "missing or invalid query parameter"}
+        if url.path == "/player":
+            return 200, self.store.player_best(query.get("name", ""), difficulty)
+        if url.path == "/version":
+            return 200, {"version": self.store.version, "count": self.store.count}
+        return 404, {"error": "not found"}
+
+    async def _grade(self, method, body):
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            submissions = json.loads(body)
+        except ValueError:
+            return 400, {"error": "body is not JSON"}
+        if not isinstance(submissions, list):
+            return 400, {"error": "body must be a list of submissions"}
+        if self._grading_pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._grading_pool = ProcessPoolExecutor()
+        results = await grading.grade_batch(submissions, self._grading_pool)
+        return 200, {"results": results, "passed": sum(r["ok"] for r in results)}
+
+
+async def serve(host, port, path):
+    server = await LeaderboardServer(leaderboard_store.JsonLinesStore(path)).start(host, port)
+    print(f"Leaderboard server on http://{host}:{server.port} storing {server.store.path}")
+    async with server.server:
+        await server.server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a shared RSA game leaderboard.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8765, help="port (default: %(default)s)")
+    parser.add_argument("--path", default=None, help="leaderboard log (default: RSA_LEADERBOARD_PATH "
+                                                     "or JSON file/leaderboard.jsonl)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Leaderboard storage.
+
+Results are appended to a JSON-lines log, one result per line, so history
+is never thrown away and a save never rewrites the file. Every result is
+also indexed in memory (leaderboard_query.LeaderboardIndex), so a save
+costs one append plus an insertion into sorted lists, and rankings and
+the top results never touch the disk.
+
+Two choices differ from a bounded top-K store:
+
+- There are no per-difficulty top-K heaps. Rankings, pages and
+  percentiles need every result sorted, and top() is the first page of
+  that index, so heaps would only duplicate it. An insertion into the
+  sorted lists is O(n) element moves rather than O(log K), but the moves
+  are a pointer memmove: about 50 us per save with 100k results stored.
+- Saves are appends, not a temp-file-and-rename. Renaming would rewrite
+  the whole log on every save. Each save is one write() of complete
+  lines in append mode, so concurrent writers do not interleave. A line
+  cut short by a crash is skipped when the log is read, and the next save
+  starts on a fresh line. atomic_write_lines is still used when the whole
+  file is replaced (legacy import, compact()).
+
+The log location defaults to "JSON file/leaderboard.jsonl" next to this
+module and can be changed with the RSA_LEADERBOARD_PATH environment
+variable or the path argument.
+"""
+import json
+import math
+import os
+import tempfile
+
+import leaderboard_query
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(HERE, "JSON file", "leaderboard.jsonl")
+# Old top-10 file written by earlier versions; imported once if present
+LEGACY_PATH = os.path.join(HERE, "JSON file", "leaderboard.json")
+TOP_K = 10  # results top() returns when no limit is given
+
+
+def default_path():
+    """The configured leaderboard log path."""
+    return os.environ.get("RSA_LEADERBOARD_PATH") or DEFAULT_PATH
+
+
+def valid_time(value):
+    """True for a finite number that is not a bool."""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value))
+
+
+def indexable(entry):
+    """True for a result the index can sort: a valid time, text name and difficulty."""
+    return (isinstance(entry, dict) and valid_time(entry.get("time"))
+            and isinstance(entry.get("name", ""), str)
+            and isinstance(entry.get("difficulty", ""), str))
+
+
+def atomic_write_lines(path, lines):
+    """Write lines to path via a temporary file and an atomic rename."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".leaderboard-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class JsonLinesStore:
+    def __init__(self, path=None, legacy_path=None):
+        """Open the log at path (default: default_path()).
+
+        A legacy top-10 JSON file is imported if the log does not exist yet;
+        the game's old LEGACY_PATH is used when no path is given.
+        """
+        if path is None:
+            path = default_path()
+            legacy_path = legacy_path or LEGACY_PATH
+        self.path = path
+        self.count = 0
+        self.version = 0  # bumped whenever the indexed results change
+        self._listeners = []
+        self._torn_tail = False  # log ends mid-line, e.g. after a crash
+        if not os.path.exists(self.path) and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self._reset()
+        self.refresh_if_changed()
+        self._torn_tail = self._tail_bytes > 0
+
+    def _import_legacy(self, legacy_path):
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(entries, list):
+            atomic_write_lines(self.path, [json.dumps(e) for e in entries if isinstance(e, dict)])
+
+    def _reset(self):
+        self.count = 0
+        self.index = leaderboard_query.LeaderboardIndex()  # every result, for queries
+        self._offset = 0  # bytes of the log already indexed
+        self._tail_bytes = 0  # unterminated bytes after the offset
+        self._file_id = None
+
+    def subscribe(self, callback):
+        """Call callback() whenever new results have been indexed."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def refresh_if_changed(self):
+        """Index results appended to the log since the last check.
+
+        Costs one stat() when nothing changed; otherwise only the new bytes
+        are read, unless the log was replaced or truncated, in which case it
+        is re-read in full. Returns True if new results were indexed.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        file_id = (st.st_dev, st.st_ino)
+        if file_id != self._file_id or st.st_size < self._offset:
+            had_results = self.count > 0
+            self._reset()
+            self._file_id = file_id
+            if had_results:
+                self.version += 1
+        elif st.st_size == self._offset + self._tail_bytes:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        self._offset += complete
+        self._tail_bytes = len(data) - complete
+        added = []
+        for line in data[:complete].splitlines():
+            try:
+                entry = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue  # e.g. a line cut short by a crash
+            if indexable(entry):  # skip damaged results, e.g. "time": null
+                added.append(entry)
+        self.count += len(added)
+        self.index.add_many(added)
+        if added:
+            self.version += 1
+            for callback in list(self._listeners):
+                callback()
+        return bool(added)
+
+    def add(self, entry):
+        """Append a result to the log and index it.
+
+        Results appended by other writers since the last refresh are picked
+        up at the same time, and subscribers are notified.
+        """
+        self.add_many([entry])
+
+    def add_many(self, entries):
+        """Append several results with a single write."""
+        data = "".join(json.dumps(entry) + "\n" for entry in entries)
+        if not data:
+            return
+        if self._torn_tail:
+            data = "\n" + data
+            self._torn_tail = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One write per batch in append mode keeps concurrent writers from interleaving
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+        self.refresh_if_changed()
+
+    def top(self, difficulty=None, limit=None):
+        """The fastest limit (default TOP_K) results, best first, for one difficulty or overall."""
+        return self.index.ranking(difficulty, 1, limit or TOP_K)
+
+    def ranking(self, difficulty=None, page=1, page_size=10):
+        """One page of results for a difficulty (None = overall), fastest first."""
+        return self.index.ranking(difficulty, page, page_size)
+
+    def page_count(self, difficulty=None, page_size=10):
+        return self.index.page_count(difficulty, page_size)
+
+    def player_best(self, name, difficulty=None):
+        """A player's fastest result, or None."""
+        return self.index.player_best(name, difficulty)
+
+    def percentile(self, time, difficulty=None, name=None):
+        """Percentage of players this time beats (see LeaderboardIndex.percentile)."""
+        return self.index.percentile(time, difficulty, name)
+
+    def entries(self):
+        """Every stored result, in the order it was saved."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        results = []
+        for line in lines:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return results
+
+    def compact(self):
+        """Rewrite the log atomically, dropping damaged lines."""
+        atomic_write_lines(self.path, [json.dumps(e) for e in self.entries()])
@@ -1,7 +1,27 @@
+"""Start the RSA Cryptography Game.
+
+    python main.py                 play
+    python main.py --startup-time  print the time to the first window and exit
+"""
+import time
+
+STARTED = time.perf_counter()  # before the heavier imports below
+
+import sys
 import tkinter as tk
 from game_application import RSAGameApp
 
+
+def report_startup(root):
+    """Print the time from launch to the first drawn window, then quit."""
+    print(f"First window after {(time.perf_counter() - STARTED) * 1000:.1f} ms")
+    root.destroy()
+
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = RSAGameApp(root)
-    root.mainloop()
\ No newline at end of file
+    if "--startup-time" in sys.argv[1:]:
+        root.update()  # draw the first frame
+        root.after_idle(report_startup, root)
+    root.mainloop()
@@ -0,0 +1,91 @@
+"""Process-pool encryption and decryption for large payloads.
+
+Blocks are independent, so they are split into chunks and exponentiated
+in worker processes; results come back in the original order. Inputs
+whose estimated work is too small to repay pool startup and pickling are
+processed serially instead.
+"""
+import os
+
+import rsa_engine
+
+TASKS_PER_WORKER = 4  # default chunking when no chunk_size is given
+# Estimated cost units (exponent bits * modulus bits^2 per block) below
+# which the serial path is used; roughly 50 ms of single-core work.
+MIN_PARALLEL_WORK = 5 * 10 ** 10
+
+
+def _pow_chunk(blocks, exponent, modulus):
+    return [pow(b, exponent, modulus) for b in blocks]
+
+
+def _decrypt_chunk(blocks, key, crt):
+    return rsa_engine.decrypt_blocks(blocks, key, crt)
+
+
+def estimated_work(count, exponent, modulus):
+    """Rough cost of count exponentiations, for the serial/parallel choice."""
+    return count * exponent.bit_length() * modulus.bit_length() ** 2
+
+
+def _chunks(blocks, chunk_size):
+    return [blocks[i:i + chunk_size] for i in range(0, len(blocks), chunk_size)]
+
+
+def _run(func, blocks, args, workers, chunk_size, executor):
+    """Map func over chunks of blocks in a pool and flatten in order."""
+    if not blocks:
+        return []
+    if not chunk_size:
+        chunk_size = -(-len(blocks) // (workers * TASKS_PER_WORKER)) or 1
+    chunks = _chunks(blocks, chunk_size)
+    repeated = [[a] * len(chunks) for a in args]
+    if executor is not None:
+        results = list(executor.map(func, chunks, *repeated))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(func, chunks, *repeated))
+    return [b for chunk in results for b in chunk]
+
+
+def use_serial(blocks, exponent, modulus, workers, min_work):
+    workers = workers or os.cpu_count() or 1
+    return workers <= 1 or estimated_work(len(blocks), exponent, modulus) < min_work
+
+
+def encrypt_blocks(blocks, e, n, workers=None, chunk_size=None,
+                   min_work=MIN_PARALLEL_WORK, executor=None):
+    """Encrypt integer blocks across worker processes, preserving order.
+
+    workers defaults to the CPU count and chunk_size (blocks per task) to
+    an even split into a few tasks per worker. Pass an existing executor
+    to reuse a pool across calls.
+    """
+    blocks = list(blocks)
+    if executor is None and use_serial(blocks, e, n, workers, min_work):
+        return _pow_chunk(blocks, e, n)
+    return _run(_pow_chunk, blocks, (e, n), workers or os.cpu_count(), chunk_size, executor)
+
+
+def decrypt_blocks(ciphertext, key, crt=True, workers=None, chunk_size=None,
+                   min_work=MIN_PARALLEL_WORK, executor=None):
+    """Decrypt integer blocks with a full key across worker processes."""
+    ciphertext = list(ciphertext)
+    if executor is None and use_serial(ciphertext, key.d, key.n, workers, min_work):
+        return rsa_engine.decrypt_blocks(ciphertext, key, crt)
+    return _run(_decrypt_chunk, ciphertext, (key, crt), workers or os.cpu_count(),
+                chunk_size, executor)
+
+
+def encrypt_packed(message, e, n, **options):
+    """Parallel version of rsa_engine.encrypt_packed."""
+    if isinstance(message, str):
+        message = message.encode("utf-8")
+    return encrypt_blocks(rsa_engine.pack_bytes(message, n), e, n, **options)
+
+
+def decrypt_packed(ciphertext, key, crt=True, **options):
+    """Parallel version of rsa_engine.decrypt_packed_with_key."""
+    blocks = decrypt_blocks(ciphertext, key, crt, **options)
+    return rsa_engine.unpack_blocks(blocks, key.n).decode("utf-8")
@@ -0,0 +1,63 @@
+"""Sieve-backed prime index covering the game's difficulty ranges.
+
+The sieve is built once, on first use, and answers membership, per-band
+counts and nth-prime lookups without running a primality test.
+"""
+from bisect import bisect_left, bisect_right
+
+# Largest number covered by the default index (top of the Hard range)
+DEFAULT_LIMIT = 9999
+
+
+class PrimeIndex:
+    def __init__(self, limit=DEFAULT_LIMIT):
+        self.limit = limit
+        # flags[i] is 1 when 2*i + 1 is prime; even numbers are never stored
+        flags = bytearray([1]) * (limit // 2 + 1)
+        flags[0] = 0  # 1 is not prime
+        i = 3
+        while i * i <= limit:
+            if flags[i // 2]:
+                start = i * i // 2
+                flags[start::i] = bytes(len(range(start, len(flags), i)))
+            i += 2
+        self._flags = flags
+        self.primes = ([2] if limit >= 2 else []) + [
+            2 * i + 1 for i in range(1, len(flags)) if flags[i] and 2 * i + 1 <= limit]
+
+    def __contains__(self, num):
+        return self.is_prime(num)
+
+    def is_prime(self, num):
+        """O(1) membership test for 0 <= num <= limit."""
+        if not 0 <= num <= self.limit:
+            raise ValueError(f"{num} is outside the indexed range 0-{self.limit}")
+        if num % 2 == 0:
+            return num == 2
+        return bool(self._flags[num // 2])
+
+    def count(self, low, high):
+        """Number of primes in the inclusive range [low, high]."""
+        return bisect_right(self.primes, high) - bisect_left(self.primes, low)
+
+    def primes_between(self, low, high):
+        """Sorted list of the primes in the inclusive range [low, high]."""
+        return self.primes[bisect_left(self.primes, low):bisect_right(self.primes, high)]
+
+    def nth_prime(self, n, low=2):
+        """The n-th prime (0-based) that is >= low, or IndexError."""
+        index = bisect_left(self.primes, low) + n
+        if n < 0 or index >= len(self.primes):
+            raise IndexError("prime index out of range")
+        return self.primes[index]
+
+
+_default_index = None
+
+
+def default_index():
+    """Shared index up to DEFAULT_LIMIT, built lazily on first call."""
+    global _default_index
+    if _default_index is None:
+        _default_index = PrimeIndex()
+    return _default_index
@@ -0,0 +1,122 @@
+"""Command-line packed-mode encryption and decryption of files.
+
+Examples (run from the "Rsa Game" directory):
+    python rsa_cli.py encrypt -p 1009 -q 1013 -e 17 message.txt message.rsa
+    python rsa_cli.py decrypt -p 1009 -q 1013 -e 17 message.rsa message.out
+    python rsa_cli.py keygen --difficulty 2 --count 30 > medium_keys.jsonl
+    python rsa_cli.py keygen --bits 1024 --count 5
+
+Use "-" for stdin/stdout. Files are processed in bounded chunks, so inputs
+of any size can be used. An output file is written under a temporary name
+and only renamed into place once the whole input has been processed, so a
+failed run (e.g. decrypting with the wrong key) leaves no partial output.
+keygen prints one JSON key per line.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import keygen
+import rsa_engine
+import rsa_stream
+
+
+def open_input(name):
+    return sys.stdin.buffer if name == "-" else open(name, "rb")
+
+
+def open_output(name):
+    """(file, temporary path) to write name through; the path is None for stdout."""
+    if name == "-":
+        return sys.stdout.buffer, None
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(name)),
+                                    prefix=".rsa-", suffix=".tmp")
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def run_keygen(args):
+    for _ in range(args.count):
+        if args.bits:
+            key = keygen.generate_keypair(args.bits, args.e)
+            p, q, e = key.p, key.q, key.e
+        else:
+            p, q, e = keygen.generate_practice_round(args.difficulty)
+            key = rsa_engine.generate_keys(p, q, e)
+        print(json.dumps({"p": p, "q": q, "n": key.n, "e": e, "d": key.d}))
+
+
+def run(args):
+    error = rsa_engine.validate_primes(args.p, args.q)
+    if error:
+        raise SystemExit(error)
+    try:
+        key = rsa_engine.generate_keys(args.p, args.q, args.e)
+    except ValueError as err:
+        raise SystemExit(str(err))
+
+    start = time.perf_counter()
+    src = open_input(args.input)
+    dst, tmp_path = open_output(args.output)
+    finished = False
+    try:
+        if args.command == "encrypt":
+            blocks = rsa_stream.encrypt_stream(src, key.e, key.n, args.chunk_size)
+            count = rsa_stream.write_ciphertext(blocks, key.n, dst, args.chunk_size)
+            summary = f"{count} blocks"
+        else:
+            blocks = rsa_stream.read_ciphertext(src, key.n, args.chunk_size)
+            size = 0
+            for chunk in rsa_stream.decrypt_stream_with_key(blocks, key, not args.no_crt,
+                                                            args.chunk_size):
+                dst.write(chunk)
+                size += len(chunk)
+            summary = f"{size} bytes"
+        finished = True
+    finally:
+        if src is not sys.stdin.buffer:
+            src.close()
+        if tmp_path:
+            dst.close()
+            if finished:
+                os.replace(tmp_path, args.output)
+            else:
+                os.unlink(tmp_path)
+    print(f"{args.command}ed {summary} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Encrypt or decrypt files with RSA (packed mode).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("encrypt", "decrypt"):
+        sub = commands.add_parser(name)
+        sub.add_argument("input", help="input file, or - for stdin")
+        sub.add_argument("output", help="output file, or - for stdout")
+        sub.add_argument("-p", type=int, required=True, help="first prime")
+        sub.add_argument("-q", type=int, required=True, help="second prime")
+        sub.add_argument("-e", type=int, required=True, help="public exponent")
+        sub.add_argument("--chunk-size", type=int, default=rsa_stream.DEFAULT_CHUNK_SIZE,
+                         help="bytes read per chunk (default: %(default)s)")
+        sub.add_argument("--no-crt", action="store_true", help="decrypt without CRT")
+        sub.set_defaults(func=run)
+    sub = commands.add_parser("keygen", help="print random keys as JSON lines")
+    size = sub.add_mutually_exclusive_group(required=True)
+    size.add_argument("--bits", type=int, help="modulus size in bits")
+    size.add_argument("--difficulty", type=int, choices=sorted(rsa_engine.DIFFICULTY_RANGES),
+                      help="game difficulty (1=Easy, 2=Medium, 3=Hard)")
+    sub.add_argument("--count", type=int, default=1, help="number of keys (default: %(default)s)")
+    sub.add_argument("-e", type=int, default=65537,
+                     help="public exponent for --bits keys (default: %(default)s)")
+    sub.set_defaults(func=run_keygen)
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except ValueError as err:
+        # e.g. decrypting with the wrong key, or keygen --bits too small
+        raise SystemExit(f"{args.command} failed: {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+"""Headless RSA primitives shared by the game and offline grading.
+
+Nothing in here imports tkinter, so the module can be used from scripts
+and worker processes without building a window.
+"""
+import functools
+import math
+import random
+from collections import namedtuple
+import prime_index
+import rsa_vector
+
+# Prime ranges for each difficulty level (inclusive)
+DIFFICULTY_RANGES = {
+    1: (10, 99),      # Easy (2-digit primes)
+    2: (100, 999),    # Medium (3-digit primes)
+    3: (1000, 9999),  # Hard (4-digit primes)
+}
+DIFFICULTY_NAMES = {1: "Easy", 2: "Medium", 3: "Hard"}
+
+# Public exponents offered to the player, smallest first
+PUBLIC_EXPONENTS = [3, 5, 7, 11, 17, 257, 65537]
+
+# dp, dq and qinv are the CRT decryption parameters (None when p == q)
+RSAKey = namedtuple("RSAKey", ["p", "q", "n", "phi", "e", "d", "dp", "dq", "qinv"])
+
+# Rounds kept in the key-material caches; players replay the same primes a lot
+KEY_CACHE_SIZE = 256
+
+# Per-character lookup tables (see table_pow_blocks). The thresholds come
+# from benchmarks/bench_table.py.
+TABLE_MIN_LENGTH = 32  # shorter inputs are exponentiated directly; Hard keys break even here
+TABLE_MIN_REPEATS = 0.25  # fraction of blocks that must already be known or repeat
+TABLE_MAX_ENTRIES = 4096  # distinct blocks kept per key
+# Exponentiations done to fill tables, and ones the tables saved
+_table_counts = {"computed": 0, "saved": 0}
+
+
+SMALL_PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+
+# Witness sets proven sufficient for every n below the bound
+MR_WITNESSES = [
+    (2047, [2]),
+    (1373653, [2, 3]),
+    (25326001, [2, 3, 5]),
+    (3215031751, [2, 3, 5, 7]),
+    (2152302898747, [2, 3, 5, 7, 11]),
+    (3474749660383, [2, 3, 5, 7, 11, 13]),
+    (341550071728321, [2, 3, 5, 7, 11, 13, 17]),
+    # Sinclair's seven bases cover every n < 2^64
+    (1 << 64, [2, 325, 9375, 28178, 450775, 9780504, 1795265022]),
+]
+
+
+def is_prime(num, k=5, deterministic=True):
+    """Primality test.
+
+    Numbers covered by the prime index are answered by lookup. Larger
+    numbers use Miller-Rabin with a proven witness set below 2^64 and
+    Baillie-PSW above that. With deterministic=False the old k-round
+    random-witness Miller-Rabin is used instead.
+    """
+    if num < 2:
+        return False
+    if num <= prime_index.DEFAULT_LIMIT:
+        return prime_index.default_index().is_prime(num)
+    if not deterministic:
+        return miller_rabin(num, k)
+    if num < 1 << 64:
+        return deterministic_miller_rabin(num)
+    return bpsw(num)
+
+
+def miller_rabin(num, k=5):
+    """Miller-Rabin primality test."""
+    if num < 2:
+        return False
+    for prime in [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31]:
+        if num % prime == 0:
+            return num == prime
+    d = num - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for _ in range(k):
+        a = random.randint(2, min(num - 2, 1 << 20))
+        x = pow(a, d, num)
+        if x == 1 or x == num - 1:
+            continue
+        for __ in range(s - 1):
+            x = pow(x, 2, num)
+            if x == num - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _strong_probable_prime(num, a, d, s):
+    """Single Miller-Rabin round for witness a, where num - 1 = d * 2^s."""
+    x = pow(a, d, num)
+    if x == 1 or x == num - 1:
+        return True
+    for _ in range(s - 1):
+        x = x * x % num
+        if x == num - 1:
+            return True
+    return False
+
+
+def _split_even(num):
+    """Return (d, s) with num = d * 2^s and d odd."""
+    s = (num & -num).bit_length() - 1
+    return num >> s, s
+
+
+def deterministic_miller_rabin(num):
+    """Miller-Rabin with a fixed witness set; exact for num < 2^64.
+
+    Raises ValueError for larger numbers, which no witness set here
+    covers; use is_prime (or bpsw) for those.
+    """
+    if num < 2:
+        return False
+    if num >= MR_WITNESSES[-1][0]:
+        raise ValueError("deterministic Miller-Rabin is only exact below 2^64")
+    for prime in SMALL_PRIMES:
+        if num % prime == 0:
+            return num == prime
+    d, s = _split_even(num - 1)
+    for bound, witnesses in MR_WITNESSES:
+        if num < bound:
+            break
+    return all(_strong_probable_prime(num, a, d, s) for a in witnesses)
+
+
+def _jacobi(a, n):
+    """Jacobi symbol (a/n) for odd positive n."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas_probable_prime(num):
+    """Strong Lucas test with Selfridge's parameters (P = 1)."""
+    D = 5
+    while True:
+        j = _jacobi(D, num)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != num:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    Q = (1 - D) // 4
+
+    k, s = _split_even(num + 1)
+    U, V, Qk = 1, 1, Q % num
+    for bit in bin(k)[3:]:
+        U = U * V % num
+        V = (V * V - 2 * Qk) % num
+        Qk = Qk * Qk % num
+        if bit == "1":
+            U, V = U + V, D * U + V
+            if U % 2:
+                U += num
+            if V % 2:
+                V += num
+            U, V = U // 2 % num, V // 2 % num
+            Qk = Qk * Q % num
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % num
+        if V == 0:
+            return True
+        Qk = Qk * Qk % num
+    return False
+
+
+def bpsw(num):
+    """Baillie-PSW test: a base-2 Miller-Rabin round plus a strong Lucas test.
+
+    No composite passing both is known.
+    """
+    if num < 2:
+        return False
+    for prime in SMALL_PRIMES:
+        if num % prime == 0:
+            return num == prime
+    d, s = _split_even(num - 1)
+    if not _strong_probable_prime(num, 2, d, s):
+        return False
+    if math.isqrt(num) ** 2 == num:
+        return False
+    return _strong_lucas_probable_prime(num)
+
+
+def band_primes(difficulty):
+    """All primes allowed for a difficulty level, in ascending order."""
+    return prime_index.default_index().primes_between(*DIFFICULTY_RANGES[difficulty])
+
+
+def band_prime_count(difficulty):
+    """Number of primes allowed for a difficulty level."""
+    return prime_index.default_index().count(*DIFFICULTY_RANGES[difficulty])
+
+
+def band_nth_prime(difficulty, n):
+    """The n-th (0-based) prime allowed for a difficulty level."""
+    low, high = DIFFICULTY_RANGES[difficulty]
+    prime = prime_index.default_index().nth_prime(n, low)
+    if prime > high:
+        raise IndexError("prime index out of range")
+    return prime
+
+
+def extended_gcd(a, b):
+    """Extended Euclidean Algorithm.
+
+    Returns (g, x, y) with a*x + b*y = g = gcd(a, b). Iterative, so it does
+    not grow the call stack with the size of the inputs.
+    """
+    x0, y0, x1, y1 = 0, 1, 1, 0
+    while a:
+        q, r = divmod(b, a)
+        b, a = a, r
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return (b, x0, y0)
+
+
+def mod_inverse(e, phi):
+    """Modular inverse of e mod phi, or None if it does not exist."""
+    try:
+        return pow(e, -1, phi)
+    except ValueError:
+        return None
+
+
+def validate_primes(p, q, difficulty=None):
+    """Check p and q for a round.
+
+    Returns None when both are acceptable, otherwise the error message the
+    game shows to the player. Unknown difficulties skip the range check.
+    """
+    if not (is_prime(p) and is_prime(q)):
+        return "Invalid prime numbers!"
+
+    if difficulty in DIFFICULTY_RANGES:
+        low, high = DIFFICULTY_RANGES[difficulty]
+        if not (low <= p <= high and low <= q <= high):
+            digits = len(str(low))
+            return (f"For {DIFFICULTY_NAMES[difficulty]} difficulty, "
+                    f"both primes must be {digits}-digit numbers!")
+    return None
+
+
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
+def valid_exponents(phi):
+    """The PUBLIC_EXPONENTS below phi and coprime with it, as a (cached) tuple."""
+    return tuple(e for e in PUBLIC_EXPONENTS if e < phi and math.gcd(e, phi) == 1)
+
+
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
+def generate_keys(p, q, e):
+    """Derive the full key for primes p, q and public exponent e.
+
+    Keys are cached by (p, q, e), so a replayed round costs a dictionary
+    lookup; see key_cache_info(). generate_keys.__wrapped__ skips the
+    cache, for one-off random keys. Raises ValueError if e is not coprime
+    with phi(n).
+    """
+    phi = (p - 1) * (q - 1)
+    if math.gcd(e, phi) != 1:
+        raise ValueError("Invalid public exponent!")
+    d = mod_inverse(e, phi)
+    qinv = mod_inverse(q, p) if p != q else None
+    if qinv is None:
+        return RSAKey(p, q, p * q, phi, e, d, None, None, None)
+    # d % (p - 1) is 0 when p == 2, and c^0 would lose c; c^(p-1) is the same
+    # residue as c^d mod p for every c, including multiples of p
+    return RSAKey(p, q, p * q, phi, e, d, d % (p - 1) or p - 1, d % (q - 1) or q - 1, qinv)
+
+
+def key_cache_info():
+    """Hit/miss counters for the key and valid-exponent caches."""
+    return {"keys": generate_keys.cache_info(), "exponents": valid_exponents.cache_info()}
+
+
+def clear_key_cache():
+    generate_keys.cache_clear()
+    valid_exponents.cache_clear()
+
+
+def pow_blocks(blocks, exponent, n):
+    """pow(b, exponent, n) for every block.
+
+    Small moduli with enough blocks go through rsa_vector when NumPy is
+    installed; the results are the same either way.
+    """
+    if rsa_vector.usable(n, len(blocks), (exponent,)):
+        return rsa_vector.pow_list(blocks, exponent, n)
+    return [pow(b, exponent, n) for b in blocks]
+
+
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
+def _char_table(exponent, n):
+    """block -> pow(block, exponent, n) for one key, filled as blocks are seen."""
+    return {}
+
+
+def table_pow_blocks(blocks, exponent, n, compute=None):
+    """pow_blocks through a cached lookup table for (exponent, n).
+
+    Per-character ciphertext repeats a small alphabet, so each distinct
+    block is exponentiated once per key and every other occurrence is a
+    dict lookup. The table is skipped, and compute(blocks) (default
+    pow_blocks) used directly, when the input is shorter than
+    TABLE_MIN_LENGTH or too few of its blocks repeat or are already in the
+    table to pay for the lookups, e.g. packed-mode blocks.
+    """
+    if compute is None:
+        compute = lambda values: pow_blocks(values, exponent, n)
+    if len(blocks) < TABLE_MIN_LENGTH:
+        return compute(blocks)
+    table = _char_table(exponent, n)
+    missing = list(set(blocks).difference(table))
+    if (len(missing) > len(blocks) * (1 - TABLE_MIN_REPEATS)
+            or len(table) + len(missing) > TABLE_MAX_ENTRIES):
+        return compute(blocks)
+    if missing:
+        table.update(zip(missing, compute(missing)))
+    _table_counts["computed"] += len(missing)
+    _table_counts["saved"] += len(blocks) - len(missing)
+    return list(map(table.__getitem__, blocks))
+
+
+def char_table_info():
+    """Table cache counters, with the exponentiations computed and saved."""
+    return dict(_table_counts, tables=_char_table.cache_info())
+
+
+def _check_fits(message, n):
+    if message and max(map(ord, message)) >= n:
+        raise ValueError(f"Message has characters that do not fit below n = {n}!")
+
+
+def encrypt(message, e, n):
+    """Encrypt a string one character at a time: c = ord(m)^e mod n.
+
+    Raises ValueError if a character's code point does not fit below n,
+    since it could not be recovered by decryption.
+    """
+    _check_fits(message, n)
+    return table_pow_blocks(list(map(ord, message)), e, n)
+
+
+def decrypt(ciphertext, d, n):
+    """Decrypt a list of per-character blocks back into a string."""
+    return ''.join(map(chr, table_pow_blocks(ciphertext, d, n)))
+
+
+def decrypt_blocks(ciphertext, key, crt=True):
+    """Decrypt integer blocks with a full key.
+
+    With crt=True each block costs two exponentiations modulo p and q with
+    half-size exponents instead of one modulo n. Keys without CRT
+    parameters (p == q) always use the plain path.
+    """
+    if not crt or key.qinv is None:
+        return pow_blocks(ciphertext, key.d, key.n)
+    if rsa_vector.usable(key.n, len(ciphertext)):
+        return rsa_vector.crt_list(ciphertext, key)
+    p, q, dp, dq, qinv = key.p, key.q, key.dp, key.dq, key.qinv
+    blocks = []
+    for c in ciphertext:
+        m1 = pow(c, dp, p)
+        m2 = pow(c, dq, q)
+        blocks.append(m2 + (qinv * (m1 - m2) % p) * q)
+    return blocks
+
+
+def decrypt_with_key(ciphertext, key, crt=True):
+    """Decrypt per-character blocks into a string using a full key."""
+    blocks = table_pow_blocks(ciphertext, key.d, key.n,
+                              lambda values: decrypt_blocks(values, key, crt))
+    return ''.join(map(chr, blocks))
+
+
+def crt_matches_plain(ciphertext, key):
+    """Check that CRT and plain decryption agree on every block."""
+    return decrypt_blocks(ciphertext, key, crt=True) == decrypt_blocks(ciphertext, key, crt=False)
+
+
+# Packed mode. Bytes are split into k-bit blocks, k = n.bit_length() - 1, so
+# every block is below n. Blocks are produced in groups that span a whole
+# number of bytes; the data is zero-padded to a full group and one extra
+# trailing block records how many padding bytes to strip. This is a framing
+# scheme, not cryptographic padding.
+
+def packing_shape(n):
+    """Return (k, bytes per group, blocks per group) for modulus n."""
+    k = n.bit_length() - 1
+    if k < 1:
+        raise ValueError("Modulus is too small for packed mode!")
+    group_bits = math.lcm(k, 8)
+    return k, group_bits // 8, group_bits // k
+
+
+def pack_bytes(data, n, final=True):
+    """Split bytes into integer blocks below n.
+
+    With final=False the data must be a whole number of groups and no
+    padding or trailer is added, so long inputs can be packed piecewise.
+    """
+    k, group_bytes, per_group = packing_shape(n)
+    pad = -len(data) % group_bytes
+    if pad and not final:
+        raise ValueError("Non-final chunks must be a multiple of the group size!")
+    data = bytes(data) + bytes(pad)
+    mask = (1 << k) - 1
+    shifts = range((per_group - 1) * k, -1, -k)
+    blocks = []
+    for start in range(0, len(data), group_bytes):
+        value = int.from_bytes(data[start:start + group_bytes], "big")
+        blocks.extend([(value >> shift) & mask for shift in shifts])
+    if final:
+        blocks.append(pad)
+    return blocks
+
+
+def unpack_blocks(blocks, n, final=True):
+    """Reassemble bytes from blocks produced by pack_bytes.
+
+    Raises ValueError if the blocks are not a valid packing (for example
+    after decrypting with the wrong key).
+    """
+    k, group_bytes, per_group = packing_shape(n)
+    if final:
+        if not blocks:
+            raise ValueError("Packed data is missing its length block!")
+        pad, blocks = blocks[-1], blocks[:-1]
+        if not 0 <= pad < group_bytes:
+            raise ValueError("Invalid padding length!")
+    else:
+        pad = 0
+    if len(blocks) % per_group:
+        raise ValueError("Packed data is not a whole number of groups!")
+    limit = 1 << k
+    out = bytearray()
+    for start in range(0, len(blocks), per_group):
+        value = 0
+        for block in blocks[start:start + per_group]:
+            if not 0 <= block < limit:
+                raise ValueError("Block is out of range for this modulus!")
+            value = (value << k) | block
+        out += value.to_bytes(group_bytes, "big")
+    if pad:
+        del out[-pad:]
+    return bytes(out)
+
+
+def encrypt_packed(message, e, n):
+    """Encrypt a string (as UTF-8) or bytes in packed blocks."""
+    if isinstance(message, str):
+        message = message.encode("utf-8")
+    return [pow(m, e, n) for m in pack_bytes(message, n)]
+
+
+def decrypt_packed(ciphertext, d, n):
+    """Decrypt packed blocks back into a string."""
+    return unpack_blocks([pow(c, d, n) for c in ciphertext], n).decode("utf-8")
+
+
+def decrypt_packed_with_key(ciphertext, key, crt=True):
+    """Decrypt packed blocks into a string using a full key."""
+    return unpack_blocks(decrypt_blocks(ciphertext, key, crt), key.n).decode("utf-8")
+
+
+# Batch API. Each round is a (p, q, e, message) tuple; for batch_decrypt the
+# last element is the ciphertext list instead of the message.
+
+def batch_validate(rounds, difficulty=None):
+    """Validate the primes of every round; returns a list of errors or None."""
+    return [validate_primes(p, q, difficulty) for p, q, _, _ in rounds]
+
+
+def batch_generate_keys(rounds):
+    """Generate keys for every round; invalid exponents give None."""
+    keys = []
+    for p, q, e, _ in rounds:
+        try:
+            keys.append(generate_keys(p, q, e))
+        except ValueError:
+            keys.append(None)
+    return keys
+
+
+def _batch_pow(blocks_per_round, exponents, moduli):
+    """pow over several rounds' blocks, in one vectorised pass if possible.
+
+    Returns None when the rounds are not suitable for rsa_vector.
+    """
+    total = sum(map(len, blocks_per_round))
+    if not moduli or min(moduli) < 1 or not rsa_vector.usable(max(moduli), total, exponents):
+        return None
+    return rsa_vector.pow_batches(blocks_per_round, exponents, moduli)
+
+
+def batch_encrypt(rounds):
+    """Encrypt the message of every round with its own public key."""
+    for p, q, _, message in rounds:
+        _check_fits(message, p * q)
+    codes = [list(map(ord, message)) for _, _, _, message in rounds]
+    batched = _batch_pow(codes, [e for _, _, e, _ in rounds], [p * q for p, q, _, _ in rounds])
+    if batched is not None:
+        return batched
+    return [encrypt(message, e, p * q) for p, q, e, message in rounds]
+
+
+def batch_decrypt(rounds):
+    """Decrypt the ciphertext of every round with the matching private key."""
+    keys = batch_generate_keys(rounds)
+    valid = [(key, list(ciphertext)) for key, (_, _, _, ciphertext) in zip(keys, rounds)
+             if key is not None]
+    batched = _batch_pow([c for _, c in valid], [key.d for key, _ in valid],
+                         [key.n for key, _ in valid])
+    if batched is not None:
+        decrypted = iter(''.join(map(chr, blocks)) for blocks in batched)
+        return [None if key is None else next(decrypted) for key in keys]
+    results = []
+    for key, (_, _, _, ciphertext) in zip(keys, rounds):
+        results.append(None if key is None else decrypt_with_key(ciphertext, key))
+    return results
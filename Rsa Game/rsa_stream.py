@@ -0,0 +1,108 @@
+"""Streaming packed-mode encryption over files and iterables.
+
+Input is consumed in bounded chunks and ciphertext blocks are produced as
+they are ready, so memory use does not grow with the size of the input.
+The packing is the same as rsa_engine.encrypt_packed, so a stream and a
+single encrypt_packed call produce identical blocks.
+"""
+import rsa_engine
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_chunks(source, chunk_size):
+    """Yield bytes from a binary file object or an iterable of bytes."""
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
+
+
+def encrypt_stream(source, e, n, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield ciphertext blocks for all bytes read from source."""
+    _, group_bytes, _ = rsa_engine.packing_shape(n)
+    chunk_bytes = max(group_bytes, chunk_size - chunk_size % group_bytes)
+    buffer = bytearray()
+    for piece in _iter_chunks(source, chunk_size):
+        buffer += piece
+        while len(buffer) >= chunk_bytes:
+            for m in rsa_engine.pack_bytes(buffer[:chunk_bytes], n, final=False):
+                yield pow(m, e, n)
+            del buffer[:chunk_bytes]
+    for m in rsa_engine.pack_bytes(buffer, n):
+        yield pow(m, e, n)
+
+
+def _decrypt_stream(ciphertext, n, decrypt_batch, chunk_size):
+    """Decrypt blocks in batches, holding back the last group and trailer."""
+    _, group_bytes, per_group = rsa_engine.packing_shape(n)
+    batch = per_group * max(1, chunk_size // group_bytes)
+    pending = []
+    for c in ciphertext:
+        pending.append(c)
+        # The final group carries padding, so only flush a batch once a full
+        # group and the length block are known to follow it
+        if len(pending) > batch + per_group:
+            yield rsa_engine.unpack_blocks(decrypt_batch(pending[:batch]), n, final=False)
+            del pending[:batch]
+    tail = rsa_engine.unpack_blocks(decrypt_batch(pending), n)
+    if tail:
+        yield tail
+
+
+def decrypt_stream(ciphertext, d, n, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield plaintext bytes for an iterable of packed ciphertext blocks."""
+    return _decrypt_stream(ciphertext, n, lambda blocks: [pow(c, d, n) for c in blocks],
+                           chunk_size)
+
+
+def decrypt_stream_with_key(ciphertext, key, crt=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Like decrypt_stream, using a full key (and CRT by default)."""
+    return _decrypt_stream(ciphertext, key.n,
+                           lambda blocks: rsa_engine.decrypt_blocks(blocks, key, crt),
+                           chunk_size)
+
+
+def block_width(n):
+    """Bytes needed to store any block below n."""
+    return (n.bit_length() + 7) // 8
+
+
+def write_ciphertext(blocks, n, f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write blocks to a binary file as fixed-width big-endian integers.
+
+    Returns the number of blocks written.
+    """
+    width = block_width(n)
+    buffer = bytearray()
+    count = 0
+    for c in blocks:
+        buffer += c.to_bytes(width, "big")
+        count += 1
+        if len(buffer) >= chunk_size:
+            f.write(buffer)
+            buffer.clear()
+    f.write(buffer)
+    return count
+
+
+def read_ciphertext(f, n, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield blocks from a binary file written by write_ciphertext."""
+    width = block_width(n)
+    chunk_size = max(width, chunk_size - chunk_size % width)
+    leftover = b""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        data = leftover + chunk
+        whole = len(data) - len(data) % width
+        for start in range(0, whole, width):
+            yield int.from_bytes(data[start:start + width], "big")
+        leftover = data[whole:]
+    if leftover:
+        raise ValueError("Ciphertext file ends with a partial block!")
@@ -0,0 +1,134 @@
+"""Vectorised modular exponentiation for small moduli (optional NumPy).
+
+For the game's own difficulty levels n is below 10^8, so every block and
+every product of two blocks fits in an unsigned 64-bit integer. Square-
+and-multiply can then run over a whole message array at once: one array
+multiply and one array reduction per exponent bit, instead of one
+big-int pow per character.
+
+NumPy is optional. It is imported on first use, and usable() is False
+when it is missing, the modulus or an exponent is out of range or there
+are too few blocks to repay the array overhead; callers then fall back to
+pow(). Blocks that are negative or not below the modulus are reduced in
+Python first, as pow() would, so the results match pow() either way.
+"""
+import itertools
+
+MAX_MODULUS = 1 << 32  # residues below 2^32 multiply without overflowing uint64
+MIN_BLOCKS = 64  # shorter inputs are faster with pow() per block
+MAX_EXPONENT = (1 << 64) - 1  # per-element exponents are held as uint64
+
+_np = None
+_checked = False
+
+
+def _numpy():
+    """The numpy module, or None if it is not installed."""
+    global _np, _checked
+    if not _checked:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np, _checked = numpy, True
+    return _np
+
+
+def available():
+    """True if NumPy is installed."""
+    return _numpy() is not None
+
+
+def usable(modulus, count, exponents=()):
+    """True if count blocks modulo modulus should take the vectorised path.
+
+    Negative exponents (modular inverses) and ones above MAX_EXPONENT are
+    left to pow().
+    """
+    return (count >= MIN_BLOCKS and 0 < modulus <= MAX_MODULUS
+            and all(0 <= e <= MAX_EXPONENT for e in exponents) and available())
+
+
+def _as_array(values, modulus):
+    """values as a uint64 array, reduced modulo modulus if they do not fit."""
+    np = _numpy()
+    width = getattr(values, "width", None)
+    if width in (1, 2, 4, 8):
+        # A ciphertext.Ciphertext: reinterpret its fixed-width bytes directly
+        return np.frombuffer(values.to_bytes(), dtype=f">u{width}").astype(np.uint64)
+    values = list(values)
+    try:
+        return np.fromiter(values, dtype=np.uint64, count=len(values))
+    except OverflowError:
+        # Negative or 64-bit-plus blocks: only their residue matters
+        return np.fromiter((v % modulus for v in values), dtype=np.uint64, count=len(values))
+
+
+def pow_array(values, exponent, modulus):
+    """values ** exponent % modulus elementwise, as a uint64 array.
+
+    exponent and modulus are ints or sequences with one entry per value;
+    every modulus must be at most MAX_MODULUS and every exponent between 0
+    and MAX_EXPONENT (see usable()).
+    """
+    np = _numpy()
+    if not isinstance(values, np.ndarray):
+        values = _as_array(values, modulus)
+    if not isinstance(modulus, int):
+        modulus = np.asarray(modulus, dtype=np.uint64)
+    base = values % modulus
+    result = np.ones_like(base) % modulus
+    if isinstance(exponent, int):
+        while exponent:
+            if exponent & 1:
+                result = result * base % modulus
+            exponent >>= 1
+            if exponent:
+                base = base * base % modulus
+        return result
+    exponent = np.asarray(exponent, dtype=np.uint64)
+    one = np.uint64(1)
+    while exponent.any():
+        odd = (exponent & one).astype(bool)
+        result = np.where(odd, result * base % modulus, result)
+        exponent = exponent >> one
+        base = base * base % modulus
+    return result
+
+
+def pow_list(values, exponent, modulus):
+    """Like pow_array, but returns a list of Python ints."""
+    return pow_array(values, exponent, modulus).tolist()
+
+
+def pow_batches(blocks_per_round, exponents, moduli):
+    """pow_list over several rounds, each with its own exponent and modulus.
+
+    All rounds go through one pass of array operations; returns one list
+    of ints per round.
+    """
+    np = _numpy()
+    lengths = np.fromiter(map(len, blocks_per_round), dtype=np.int64, count=len(blocks_per_round))
+    try:
+        flat = np.fromiter(itertools.chain.from_iterable(blocks_per_round), dtype=np.uint64,
+                           count=int(lengths.sum()))
+    except OverflowError:
+        reduced = ([b % modulus for b in blocks] for blocks, modulus in zip(blocks_per_round, moduli))
+        flat = np.fromiter(itertools.chain.from_iterable(reduced), dtype=np.uint64,
+                           count=int(lengths.sum()))
+    results = pow_list(flat, np.repeat(np.asarray(exponents, dtype=np.uint64), lengths),
+                       np.repeat(np.asarray(moduli, dtype=np.uint64), lengths))
+    ends = itertools.accumulate(lengths.tolist())
+    return [results[end - length:end] for end, length in zip(ends, lengths.tolist())]
+
+
+def crt_list(values, key):
+    """Decrypt blocks with an rsa_engine.RSAKey's CRT parameters."""
+    np = _numpy()
+    c = _as_array(values, key.n)
+    p, q = key.p, key.q
+    m1 = pow_array(c, key.dp, p)
+    m2 = pow_array(c, key.dq, q)
+    # (m1 - m2) mod p without going negative in unsigned arithmetic
+    h = (m1 + np.uint64(p) - m2 % p) % p * key.qinv % p
+    return (m2 + h * q).tolist()
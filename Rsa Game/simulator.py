@@ -0,0 +1,178 @@
+"""Headless load test: synthetic players playing full game rounds.
+
+Each player goes through the same GameSession steps as the Tk game
+(check_primes, key_work, encrypt_work, decrypt_work, save_to_leaderboard)
+with random primes and messages, and the simulator reports throughput
+and per-stage latency percentiles. Players can be spread over worker
+processes, which then share one leaderboard log or server.
+
+    python simulator.py --players 2000 --mix easy=5,medium=3,hard=2 \\
+        --message-length 20-200 --workers 4
+
+Results go to a temporary leaderboard unless --leaderboard or --url is
+given, so the real leaderboard is not filled with synthetic players.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+import keygen
+import leaderboard_client
+import rsa_engine
+from game_session import GameSession
+
+STAGES = ["primes", "keys", "encrypt", "decrypt", "save"]
+LEVELS = {name.lower(): level for level, name in rsa_engine.DIFFICULTY_NAMES.items()}
+ALPHABET = string.ascii_letters + string.digits + string.punctuation + " "
+
+
+def parse_mix(text):
+    """'easy=5,medium=3,hard=2' -> ([levels], [weights])."""
+    levels, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip().lower() not in LEVELS:
+            raise argparse.ArgumentTypeError(f"unknown difficulty {name!r}")
+        levels.append(LEVELS[name.strip().lower()])
+        weights.append(float(weight or 1))
+    return levels, weights
+
+
+def parse_range(text):
+    """'20-200' -> (20, 200); '50' -> (50, 50)."""
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def play_round(session, rng, difficulty, length, packed):
+    """Play one round; returns ({stage: seconds}, decrypted correctly)."""
+    p, q, e = keygen.generate_practice_round(difficulty, rng)
+    message = "".join(rng.choice(ALPHABET) for _ in range(length))
+    session.difficulty = difficulty
+    session.packed = packed
+    latencies = {}
+
+    start = time.perf_counter()
+    session.start_round()
+    if session.check_primes(p, q):
+        raise RuntimeError(f"generated primes {p}, {q} were rejected")
+    latencies["primes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    session.keys_ready(session.key_work(e)(None))
+    latencies["keys"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    session.encrypted_ready(session.encrypt_work(message)(None))
+    latencies["encrypt"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decrypted = session.decrypt_work(session.d)(None)
+    session.decrypted_ready()
+    latencies["decrypt"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    session.save_to_leaderboard()
+    latencies["save"] = time.perf_counter() - start
+    return latencies, decrypted == message
+
+
+def run_players(first, count, options):
+    """Simulate players first .. first + count - 1; returns one record per round."""
+    store = leaderboard_client.open_store(options["url"], options["path"])
+    rng = random.Random(options["seed"] * 1000003 + first)
+    levels, weights = options["mix"]
+    low, high = options["message_length"]
+    records = []
+    for player in range(first, first + count):
+        session = GameSession(store)
+        session.player_name = f"sim-{player:05d}"
+        session.timings_path = None
+        for _ in range(options["rounds"]):
+            difficulty = rng.choices(levels, weights)[0]
+            packed = rng.random() < options["packed"]
+            latencies, ok = play_round(session, rng, difficulty, rng.randint(low, high), packed)
+            records.append((difficulty, latencies, ok))
+    return records
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[min(len(values) - 1, max(0, round(fraction * len(values)) - 1))]
+
+
+def report(records, elapsed, workers):
+    rounds = len(records)
+    print(f"{rounds} rounds in {elapsed:.2f} s with {workers} worker(s): "
+          f"{rounds / elapsed:.1f} rounds/s")
+    print(f"{'stage':<8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage in STAGES + ["round"]:
+        if stage == "round":
+            values = sorted(sum(latencies.values()) for _, latencies, _ in records)
+        else:
+            values = sorted(latencies[stage] for _, latencies, _ in records)
+        print(f"{stage:<8} " + " ".join(f"{percentile(values, f) * 1000:>9.2f}"
+                                        for f in (0.5, 0.9, 0.99, 1.0)))
+    per_level = {}
+    for difficulty, _, _ in records:
+        per_level[difficulty] = per_level.get(difficulty, 0) + 1
+    print("difficulty mix: " + ", ".join(f"{rsa_engine.DIFFICULTY_NAMES[level]} {count}"
+                                         for level, count in sorted(per_level.items())))
+    failures = sum(not ok for _, _, ok in records)
+    print(f"round trips failed: {failures}")
+    return failures
+
+
+def simulate(options, players, workers):
+    """Run every player, across worker processes if workers > 1."""
+    start = time.perf_counter()
+    if workers <= 1:
+        records = run_players(0, players, options)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        share = -(-players // workers)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(run_players, first, min(share, players - first), options)
+                       for first in range(0, players, share)]
+            records = [record for future in futures for record in future.result()]
+    return records, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate players to load-test the RSA game.")
+    parser.add_argument("--players", type=int, default=1000, help="synthetic players (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=1, help="rounds per player (default: %(default)s)")
+    parser.add_argument("--mix", type=parse_mix, default="easy=1,medium=1,hard=1",
+                        help="difficulty weights, e.g. easy=5,medium=3,hard=2 (default: even)")
+    parser.add_argument("--message-length", type=parse_range, default="20-200",
+                        help="message length or min-max range (default: %(default)s)")
+    parser.add_argument("--packed", type=float, default=0.0,
+                        help="fraction of rounds in packed mode (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes (default: %(default)s)")
+    parser.add_argument("--leaderboard", default=None,
+                        help="leaderboard log to write to (default: a temporary file)")
+    parser.add_argument("--url", default=None, help="leaderboard server to submit to instead")
+    parser.add_argument("--seed", type=int, default=2024, help="random seed (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        options = {
+            "mix": args.mix,
+            "message_length": args.message_length,
+            "packed": args.packed,
+            "rounds": args.rounds,
+            "seed": args.seed,
+            "url": args.url,
+            "path": args.leaderboard or os.path.join(directory, "leaderboard.jsonl"),
+        }
+        records, elapsed = simulate(options, args.players, args.workers)
+    return 1 if report(records, elapsed, args.workers) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""Correctness tests for the headless modules.
+
+Run from the "Rsa Game" directory:
+    python -m pytest tests
+"""
+import io
+import math
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import grading
+import keygen
+import leaderboard_server
+import leaderboard_store
+import rsa_engine
+import rsa_stream
+import rsa_vector
+from ciphertext import Ciphertext
+from game_session import GameSession
+
+# Composites that pass Miller-Rabin for many small bases
+STRONG_PSEUDOPRIMES = [
+    2047,  # base 2
+    1373653,  # bases 2, 3
+    25326001,  # bases 2, 3, 5
+    3215031751,  # bases 2, 3, 5, 7
+    2152302898747,  # bases 2 .. 11
+    3474749660383,  # bases 2 .. 13
+    341550071728321,  # bases 2 .. 17
+    3825123056546413051,  # bases 2 .. 23
+    318665857834031151167461,  # bases 2 .. 37, above 2^64
+]
+LARGE_PRIMES = [2 ** 61 - 1, 2 ** 89 - 1, 2 ** 127 - 1, 18446744073709551557]
+
+
+def sieve(limit):
+    flags = bytearray([1]) * (limit + 1)
+    flags[0:2] = b"\x00\x00"
+    for i in range(2, int(limit ** 0.5) + 1):
+        if flags[i]:
+            flags[i * i::i] = bytearray(len(flags[i * i::i]))
+    return flags
+
+
+def test_is_prime_matches_sieve():
+    flags = sieve(200000)
+    for num in range(len(flags)):
+        assert rsa_engine.is_prime(num) == bool(flags[num]), num
+        if num % 7 == 1:
+            assert rsa_engine.deterministic_miller_rabin(num) == bool(flags[num]), num
+            assert rsa_engine.bpsw(num) == bool(flags[num]), num
+
+
+@pytest.mark.parametrize("num", STRONG_PSEUDOPRIMES)
+def test_is_prime_rejects_strong_pseudoprimes(num):
+    assert not rsa_engine.is_prime(num)
+    assert not rsa_engine.bpsw(num)
+    if num < 1 << 64:
+        assert not rsa_engine.deterministic_miller_rabin(num)
+
+
+@pytest.mark.parametrize("num", LARGE_PRIMES)
+def test_is_prime_accepts_large_primes(num):
+    assert rsa_engine.is_prime(num)
+    assert rsa_engine.bpsw(num)
+    assert not rsa_engine.is_prime(num * LARGE_PRIMES[0])
+
+
+def test_deterministic_miller_rabin_refuses_unproven_range():
+    with pytest.raises(ValueError):
+        rsa_engine.deterministic_miller_rabin(2 ** 89 - 1)
+
+
+@pytest.mark.parametrize("bits", [4, 8, 17, 64, 256])
+def test_random_prime_has_exact_bit_length(bits):
+    rng = random.Random(bits)
+    for _ in range(5):
+        prime = keygen.random_prime(bits, rng)
+        assert prime.bit_length() == bits
+        assert rsa_engine.is_prime(prime)
+
+
+@pytest.mark.parametrize("bits", [keygen.MIN_KEY_BITS, 33, 128, 512])
+def test_generate_keypair(bits):
+    key = keygen.generate_keypair(bits, 65537 if bits > 32 else 17, random.Random(bits))
+    assert key.n.bit_length() == bits
+    assert key.p != key.q and rsa_engine.is_prime(key.p) and rsa_engine.is_prime(key.q)
+    assert key.e * key.d % key.phi == 1
+    assert rsa_engine.decrypt_with_key(rsa_engine.encrypt("Hi!", key.e, key.n), key) == "Hi!"
+
+
+def test_generate_keypair_rejects_tiny_keys():
+    with pytest.raises(ValueError):
+        keygen.generate_keypair(keygen.MIN_KEY_BITS - 1)
+    with pytest.raises(ValueError):
+        keygen.random_prime(3)
+
+
+def test_key_cache():
+    rsa_engine.clear_key_cache()
+    key = rsa_engine.generate_keys(11, 13, 7)
+    assert rsa_engine.generate_keys(11, 13, 7) is key
+    assert rsa_engine.generate_keys.__wrapped__(11, 13, 7) == key
+    info = rsa_engine.key_cache_info()["keys"]
+    assert (info.hits, info.misses) == (1, 1)
+    rsa_engine.clear_key_cache()
+    assert rsa_engine.key_cache_info()["keys"].currsize == 0
+    assert rsa_engine.key_cache_info()["exponents"].currsize == 0
+
+
+def counting_pow(exponent, n, calls):
+    def compute(blocks):
+        calls.append(len(blocks))
+        return [pow(b, exponent, n) for b in blocks]
+    return compute
+
+
+def test_char_table_reuses_repeated_blocks():
+    rsa_engine._char_table.cache_clear()
+    before = rsa_engine.char_table_info()
+    blocks = [ord(c) for c in "abcab" * rsa_engine.TABLE_MIN_LENGTH]
+    calls = []
+    compute = counting_pow(7, 143, calls)
+    assert rsa_engine.table_pow_blocks(blocks, 7, 143, compute) == [pow(b, 7, 143) for b in blocks]
+    assert rsa_engine.table_pow_blocks(blocks[:40], 7, 143, compute) == \
+        [pow(b, 7, 143) for b in blocks[:40]]
+    assert calls == [3]  # a, b and c once; the second call is all lookups
+    info = rsa_engine.char_table_info()
+    assert info["computed"] - before["computed"] == 3
+    assert info["saved"] - before["saved"] == len(blocks) + 40 - 3
+    assert info["tables"].currsize == 1
+
+
+def test_char_table_thresholds():
+    rsa_engine._char_table.cache_clear()
+    calls = []
+    compute = counting_pow(7, 1 << 20, calls)
+    short = [65] * (rsa_engine.TABLE_MIN_LENGTH - 1)
+    rsa_engine.table_pow_blocks(short, 7, 1 << 20, compute)
+    assert calls == [len(short)]  # too short: exponentiated directly
+    assert rsa_engine.char_table_info()["tables"].currsize == 0
+    # Too few repeats, e.g. packed blocks: the table is skipped and stays empty
+    distinct = list(range(rsa_engine.TABLE_MIN_LENGTH * 4))
+    # Shortest input in which TABLE_MIN_REPEATS of the blocks are repeats
+    needed = math.ceil(len(distinct) / (1 - rsa_engine.TABLE_MIN_REPEATS))
+    few_repeats = distinct + distinct[:needed - len(distinct) - 1]
+    rsa_engine.table_pow_blocks(few_repeats, 7, 1 << 20, compute)
+    assert calls[-1] == len(few_repeats)
+    assert rsa_engine._char_table(7, 1 << 20) == {}
+    enough_repeats = distinct + distinct[:needed - len(distinct)]
+    rsa_engine.table_pow_blocks(enough_repeats, 7, 1 << 20, compute)
+    assert calls[-1] == len(distinct)
+
+
+@pytest.mark.parametrize("p, q, e", [(2, 11, 3), (11, 2, 3), (2, 3, 5), (61, 53, 17),
+                                     (10007, 10009, 65537)])
+def test_crt_matches_plain_decryption(p, q, e):
+    key = rsa_engine.generate_keys(p, q, e)
+    blocks = list(range(min(key.n, 5000)))
+    assert rsa_engine.crt_matches_plain(blocks, key)
+    assert rsa_engine.decrypt_blocks(blocks, key) == [pow(c, key.d, key.n) for c in blocks]
+
+
+def test_packed_round_with_p_equal_to_2():
+    session = GameSession(leaderboard=object())
+    session.timings_path = None
+    session.difficulty = 0  # no difficulty chosen: no range check
+    session.packed = True
+    session.start_round()
+    assert session.check_primes(2, 11) is None
+    session.keys_ready(session.key_work(3)(None))
+    session.encrypted_ready(session.encrypt_work("hello, world")(None))
+    assert session.decrypt_work(session.d)(None) == "hello, world"
+
+
+@pytest.mark.parametrize("n", [6, 143, 3233, 100160063, (1 << 61) * 3 + 1])
+def test_pack_unpack_round_trip(n):
+    rng = random.Random(n)
+    _, group_bytes, _ = rsa_engine.packing_shape(n)
+    for length in [0, 1, group_bytes - 1, group_bytes, group_bytes + 1, 100]:
+        data = bytes(rng.randrange(256) for _ in range(length))
+        blocks = rsa_engine.pack_bytes(data, n)
+        assert all(0 <= b < n for b in blocks)
+        assert rsa_engine.unpack_blocks(blocks, n) == data
+    whole = bytes(range(group_bytes * 3))
+    assert rsa_engine.unpack_blocks(rsa_engine.pack_bytes(whole, n, final=False), n,
+                                    final=False) == whole
+
+
+def test_unpack_rejects_bad_padding():
+    blocks = rsa_engine.pack_bytes(b"abc", 3233)
+    with pytest.raises(ValueError):
+        rsa_engine.unpack_blocks(blocks[:-1] + [99], 3233)
+    with pytest.raises(ValueError):
+        rsa_engine.unpack_blocks([], 3233)
+
+
+def test_stream_round_trip():
+    key = rsa_engine.generate_keys(10007, 10009, 65537)
+    data = bytes(random.Random(1).randrange(256) for _ in range(5000))
+    blocks = list(rsa_stream.encrypt_stream(io.BytesIO(data), key.e, key.n, chunk_size=64))
+    assert blocks == rsa_engine.encrypt_packed(data, key.e, key.n)
+    f = io.BytesIO()
+    assert rsa_stream.write_ciphertext(blocks, key.n, f, chunk_size=100) == len(blocks)
+    f.seek(0)
+    read = list(rsa_stream.read_ciphertext(f, key.n, chunk_size=100))
+    assert read == blocks
+    assert b"".join(rsa_stream.decrypt_stream(read, key.d, key.n, chunk_size=64)) == data
+    assert b"".join(rsa_stream.decrypt_stream_with_key(read, key, chunk_size=64)) == data
+
+
+def test_ciphertext_file_round_trip():
+    key = rsa_engine.generate_keys(10007, 10009, 65537)
+    stored = Ciphertext.from_blocks(rsa_engine.encrypt("stored text", key.e, key.n), key.n)
+    f = io.BytesIO()
+    stored.write(f)
+    f.seek(0)
+    loaded = Ciphertext.read(f)
+    assert loaded == stored
+    assert rsa_engine.decrypt_with_key(loaded[2:], key) == "ored text"
+
+
+# Negative blocks, blocks of 2^64 and more, and enough of them for rsa_vector
+AWKWARD_BLOCKS = ([-1, -(1 << 70), 1 << 64, (1 << 64) + 5, 1 << 100, 0, 1]
+                  + [random.Random(7).randrange(-10 ** 6, 10 ** 25) for _ in range(200)])
+
+
+@pytest.mark.parametrize("n", [1, 2, 143, 100160063, (1 << 32) - 5])
+@pytest.mark.parametrize("exponent", [0, 1, 3, 65537, (1 << 70) + 1])
+def test_vector_path_matches_pow(n, exponent):
+    expected = [pow(b, exponent, n) for b in AWKWARD_BLOCKS]
+    assert rsa_engine.pow_blocks(AWKWARD_BLOCKS, exponent, n) == expected
+    if rsa_vector.available() and exponent <= rsa_vector.MAX_EXPONENT:
+        assert rsa_vector.pow_list(AWKWARD_BLOCKS, exponent, n) == expected
+
+
+def test_vector_crt_and_batches_match_pow():
+    key = rsa_engine.generate_keys(10007, 10009, 65537)
+    expected = [pow(c, key.d, key.n) for c in AWKWARD_BLOCKS]
+    assert rsa_engine.decrypt_blocks(AWKWARD_BLOCKS, key) == expected
+    if rsa_vector.available():
+        assert rsa_vector.crt_list(AWKWARD_BLOCKS, key) == expected
+    rounds = [(11, 13, 7, AWKWARD_BLOCKS), (1009, 1013, 5, AWKWARD_BLOCKS[:100])]  # n < 0x110000
+    keys = [rsa_engine.generate_keys(p, q, e) for p, q, e, _ in rounds]
+    assert rsa_engine.batch_decrypt(rounds) == [
+        "".join(chr(pow(c, key.d, key.n)) for c in blocks)
+        for key, (_, _, _, blocks) in zip(keys, rounds)]
+    huge = rsa_engine._batch_pow([[3] * 100], [1 << 70], [143])
+    assert huge is None or huge == [[pow(3, 1 << 70, 143)] * 100]
+
+
+def add_results(store, count, rng):
+    store.add_many([{"name": f"player{i}", "time": round(rng.uniform(5, 300), 2),
+                     "difficulty": rng.choice(["Easy", "Medium", "Hard"])}
+                    for i in range(count)])
+
+
+def test_store_reopen(tmp_path):
+    path = str(tmp_path / "leaderboard.jsonl")
+    store = leaderboard_store.JsonLinesStore(path)
+    add_results(store, 150, random.Random(1))
+    store.add({"name": "last", "time": 1.0, "difficulty": "Easy"})
+    reopened = leaderboard_store.JsonLinesStore(path)
+    assert reopened.count == store.count == 151
+    for difficulty in [None, "Easy", "Hard"]:
+        assert reopened.ranking(difficulty, 2, 10) == store.ranking(difficulty, 2, 10)
+        assert reopened.top(difficulty) == store.top(difficulty)
+    assert reopened.top("Easy", 1) == [{"name": "last", "time": 1.0, "difficulty": "Easy"}]
+
+
+def test_store_torn_tail(tmp_path):
+    path = str(tmp_path / "leaderboard.jsonl")
+    store = leaderboard_store.JsonLinesStore(path)
+    add_results(store, 5, random.Random(2))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"name": "crashed", "ti')  # a write cut short
+    reopened = leaderboard_store.JsonLinesStore(path)
+    assert reopened.count == 5
+    reopened.add({"name": "after", "time": 2.0, "difficulty": "Easy"})
+    assert reopened.count == 6
+    again = leaderboard_store.JsonLinesStore(path)
+    assert again.count == 6
+    assert again.player_best("after") == {"name": "after", "time": 2.0, "difficulty": "Easy"}
+
+
+BAD_RESULTS = ['{"name": "a", "time": null}', '{"name": "b", "time": "slow"}',
+               '{"name": "c", "time": true}', '{"name": "d", "time": NaN}',
+               '{"name": "e", "time": Infinity}', '{"name": ["f"], "time": 1.0}',
+               '{"name": "g", "time": 1.0, "difficulty": 3}', '["not", "an", "object"]']
+
+
+def test_store_skips_results_it_cannot_index(tmp_path):
+    path = str(tmp_path / "leaderboard.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(BAD_RESULTS + ['{"name": "ok", "time": 2.5}']) + "\n")
+    store = leaderboard_store.JsonLinesStore(path)
+    assert store.count == 1
+    with open(path, "a", encoding="utf-8") as f:  # another writer's bad lines
+        f.write("\n".join(BAD_RESULTS + ['{"name": "ok2", "time": 1.5}']) + "\n")
+    assert store.refresh_if_changed()
+    assert [e["name"] for e in store.ranking()] == ["ok2", "ok"]
+
+
+def submission(**changes):
+    key = rsa_engine.generate_keys(11, 13, 7)
+    item = {"id": "s", "p": 11, "q": 13, "e": 7, "d": key.d, "difficulty": "Easy",
+            "ciphertext": rsa_engine.encrypt("hi", 7, key.n), "plaintext": "hi"}
+    item.update(changes)
+    return item
+
+
+def test_grade_valid_submission():
+    assert grading.grade_submission(submission())["ok"]
+    for e in rsa_engine.valid_exponents(120):
+        key = rsa_engine.generate_keys(11, 13, e)
+        item = submission(e=e, d=key.d, ciphertext=rsa_engine.encrypt("hi", e, key.n))
+        assert grading.grade_submission(item)["ok"], e
+
+
+@pytest.mark.parametrize("changes, failed", [
+    ({"p": 12}, "primes"),
+    ({"p": "11"}, None),
+    ({"difficulty": "Impossible"}, None),
+    ({"difficulty": True}, None),
+    ({"p": 101, "d": rsa_engine.generate_keys(101, 13, 7).d}, "range"),
+    ({"e": 6}, "exponent"),
+    ({"d": 5}, "inverse"),
+    ({"ciphertext": "1 2"}, "round_trip"),
+    ({"ciphertext": [-1, 5]}, "round_trip"),
+    ({"ciphertext": [1 << 64] + list(range(100))}, "round_trip"),
+    ({"plaintext": "no"}, "round_trip"),
+])
+def test_grade_malformed_submission(changes, failed):
+    result = grading.grade_submission(submission(**changes))
+    assert not result["ok"]
+    assert result["errors"]
+    if failed:
+        assert result["checks"][failed] is False
+
+
+def test_grade_chunk_isolates_failures():
+    good = submission()
+    results = grading.grade_chunk([good, None, submission(difficulty=[1]), good])
+    assert [r["ok"] for r in results] == [True, False, False, True]
+    assert results[1]["errors"] == ["submission must be an object"]
+
+
+@pytest.mark.parametrize("time", [float("nan"), float("inf"), True, "1.0", None])
+def test_server_rejects_unsortable_times(time):
+    assert leaderboard_server.valid_entry({"name": "a", "time": 1.5, "difficulty": "Easy"})
+    assert not leaderboard_server.valid_entry({"name": "a", "time": time, "difficulty": "Easy"})
@@ -0,0 +1,148 @@
+"""Tests for the leaderboard index, server and client.
+
+Run from the "Rsa Game" directory:
+    python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import leaderboard_client
+import leaderboard_query
+import leaderboard_server
+import leaderboard_store
+
+OFFLINE_URL = "http://127.0.0.1:1"  # nothing listens on port 1
+
+
+def results(count, rng):
+    return [{"name": f"player{rng.randrange(count // 2 + 1)}", "time": round(rng.uniform(5, 300), 2),
+             "difficulty": rng.choice(["Easy", "Medium", "Hard"])} for _ in range(count)]
+
+
+def test_percentile_counts_each_player_once():
+    index = leaderboard_query.LeaderboardIndex()
+    for name, time in [("a", 1.0), ("b", 2.0), ("b", 9.0), ("c", 3.0)]:
+        index.add({"name": name, "time": time, "difficulty": "Easy"})
+    assert index.percentile(1.5) == pytest.approx(200 / 3)
+    assert index.percentile(2.0) == pytest.approx(100 / 3)  # a tie is not a win
+    assert index.percentile(0.5, "Easy") == 100.0
+    assert index.percentile(5.0, "Hard") == 100.0  # nobody to compare with
+    # "a" improving on their own best only competes with b and c
+    assert index.percentile(0.5, name="a") == 100.0
+    assert index.percentile(2.5, name="a") == 50.0
+
+
+def test_ranking_pages_cover_every_result():
+    index = leaderboard_query.LeaderboardIndex()
+    entries = results(25, random.Random(1))
+    for entry in entries:
+        index.add(entry)
+    assert index.page_count(page_size=10) == 3
+    assert index.page_count("Unknown") == 1
+    pages = [index.ranking(page=page, page_size=10) for page in range(1, 4)]
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [e["time"] for page in pages for e in page] == sorted(e["time"] for e in entries)
+    assert index.ranking(page=4, page_size=10) == []
+
+
+@pytest.mark.parametrize("count", [leaderboard_query.BULK_THRESHOLD - 1,
+                                   leaderboard_query.BULK_THRESHOLD, 500])
+def test_bulk_add_matches_one_at_a_time(count):
+    entries = results(count, random.Random(count))
+    single, bulk = leaderboard_query.LeaderboardIndex(), leaderboard_query.LeaderboardIndex()
+    for entry in entries:
+        single.add(entry)
+    bulk.add_many(entries[:10])
+    bulk.add_many(entries[10:])  # a bulk batch on top of existing results
+    for difficulty in [None, "Easy", "Medium", "Hard"]:
+        assert bulk.ranking(difficulty, 1, count) == single.ranking(difficulty, 1, count)
+        for time in [5.0, 100.0, 250.0]:
+            assert bulk.percentile(time, difficulty, "player1") == \
+                single.percentile(time, difficulty, "player1")
+        for name in ["player0", "player1", "nobody"]:
+            assert bulk.player_best(name, difficulty) is single.player_best(name, difficulty)
+
+
+@pytest.fixture
+def server(tmp_path):
+    """A LeaderboardServer on a free port, running on its own event loop thread."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    store = leaderboard_store.JsonLinesStore(str(tmp_path / "server.jsonl"))
+    running = asyncio.run_coroutine_threadsafe(
+        leaderboard_server.LeaderboardServer(store, batch_delay=0).start(port=0), loop).result()
+    yield running
+    asyncio.run_coroutine_threadsafe(running.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def remote_store(url, tmp_path):
+    return leaderboard_client.RemoteStore(
+        url, leaderboard_store.JsonLinesStore(str(tmp_path / "local.jsonl")))
+
+
+def test_remote_store_reads_from_server(server, tmp_path):
+    store = remote_store(f"http://127.0.0.1:{server.port}", tmp_path)
+    entries = results(30, random.Random(2))
+    store.add_many(entries)
+    store.add({"name": "fast", "time": 1.0, "difficulty": "Hard"})
+    assert store.online
+    assert store.count == 31
+    assert store.fallback.count == 0  # nothing saved locally while online
+    assert store.top("Hard", 1) == [{"name": "fast", "time": 1.0, "difficulty": "Hard"}]
+    assert store.ranking(None, 2, 10) == server.store.ranking(None, 2, 10)
+    assert store.page_count(None, 10) == 4
+    assert store.player_best("fast") == {"name": "fast", "time": 1.0, "difficulty": "Hard"}
+    assert store.player_best("nobody") is None
+    assert store.percentile(1.0, "Hard", "fast") == 100.0
+    assert not store.refresh_if_changed()
+
+
+@pytest.mark.parametrize("body", [[], [{"name": "a", "time": float("nan"), "difficulty": "Easy"}],
+                                  [{"name": "a", "time": 1.0}, {"time": 2.0}]])
+def test_server_rejects_invalid_results(server, body):
+    request = urllib.request.Request(f"http://127.0.0.1:{server.port}/results",
+                                     data=json.dumps(body).encode("utf-8"))
+    with pytest.raises(urllib.error.HTTPError) as info:
+        urllib.request.urlopen(request, timeout=5)
+    assert info.value.code == 400
+    assert server.store.count == 0
+
+
+def test_remote_store_falls_back_and_resends(server, tmp_path):
+    store = remote_store(OFFLINE_URL, tmp_path)
+    store.add({"name": "offline", "time": 4.0, "difficulty": "Easy"})
+    assert not store.online
+    assert store.top() == [{"name": "offline", "time": 4.0, "difficulty": "Easy"}]
+    assert os.path.exists(store.pending_path)
+    assert not store.refresh_if_changed()  # still down, nothing new locally
+
+    store.url = f"http://127.0.0.1:{server.port}"
+    assert store.refresh_if_changed()
+    assert store.online
+    assert not os.path.exists(store.pending_path)
+    assert server.store.top() == [{"name": "offline", "time": 4.0, "difficulty": "Easy"}]
+    assert store.send_pending() == 0
+
+
+def test_pending_results_survive_a_failed_resend(tmp_path):
+    store = remote_store(OFFLINE_URL, tmp_path)
+    store.add_many([{"name": "a", "time": 1.0, "difficulty": "Easy"},
+                    {"name": "b", "time": 2.0, "difficulty": "Easy"}])
+    with pytest.raises(OSError):
+        store.send_pending()
+    with open(store.pending_path, encoding="utf-8") as f:
+        assert [json.loads(line)["name"] for line in f] == ["a", "b"]
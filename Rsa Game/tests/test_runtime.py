@@ -0,0 +1,174 @@
+"""Tests for the parallel, background, timing and load-test modules.
+
+Run from the "Rsa Game" directory:
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import background
+import instrumentation
+import leaderboard_store
+import parallel
+import rsa_engine
+import simulator
+
+
+def test_use_serial():
+    blocks = [2] * 10
+    assert parallel.use_serial(blocks, 65537, 1 << 2047, 1, 0)  # one worker
+    assert parallel.use_serial(blocks, 3, 55, 4, parallel.MIN_PARALLEL_WORK)  # too little work
+    assert not parallel.use_serial(blocks, 3, 55, 4, 0)
+    assert not parallel.use_serial(blocks * 100, 65537, 1 << 2047, 4, parallel.MIN_PARALLEL_WORK)
+
+
+def test_parallel_blocks_keep_their_order():
+    key = rsa_engine.generate_keys(1009, 1013, 5)
+    blocks = list(range(2, 300))
+    expected = [pow(b, key.e, key.n) for b in blocks]
+    assert parallel.encrypt_blocks(blocks, key.e, key.n) == expected  # serial path
+    with ThreadPoolExecutor(3) as pool:
+        assert parallel.encrypt_blocks(blocks, key.e, key.n, chunk_size=7, executor=pool) == expected
+        assert parallel.decrypt_blocks(expected, key, executor=pool) == blocks
+    assert parallel.encrypt_blocks([], key.e, key.n, executor=ThreadPoolExecutor(1)) == []
+    # A real process pool, with min_work=0 so the small input is not run serially
+    assert parallel.decrypt_blocks(expected, key, workers=2, min_work=0) == blocks
+
+
+class FakeWidget:
+    """Collects widget.after callbacks so the test can run the polls itself."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def run_polls(self, task, timeout=10):
+        deadline = time.monotonic() + timeout
+        while self.callbacks:
+            assert time.monotonic() < deadline, "task did not finish"
+            if not task.future.done():
+                time.sleep(0.001)
+            self.callbacks.pop(0)()
+
+
+def start_task(work, events):
+    widget = FakeWidget()
+    task = background.BackgroundTask(
+        widget, work, on_done=lambda result: events.append(("done", result)),
+        on_error=lambda err: events.append(("error", type(err).__name__)),
+        on_progress=lambda fraction: events.append(("progress", fraction)),
+        on_finish=lambda: events.append(("finish", None)))
+    return widget, task
+
+
+def test_background_task_delivers_result_then_finishes():
+    events = []
+    widget, task = start_task(
+        lambda task: background.run_chunked(task, lambda items: [i * 2 for i in items],
+                                            list(range(10)), chunk_size=3), events)
+    widget.run_polls(task)
+    assert events[-2:] == [("done", list(range(0, 20, 2))), ("finish", None)]
+    assert task.progress == 1.0
+
+
+def test_background_task_reports_errors():
+    events = []
+    widget, task = start_task(lambda task: int("x"), events)
+    widget.run_polls(task)
+    assert [e for e in events if e[0] != "progress"] == [("error", "ValueError"), ("finish", None)]
+
+
+def test_cancelled_task_drops_its_result():
+    events = []
+    started, release = threading.Event(), threading.Event()
+
+    def work(task):
+        started.set()
+        release.wait(10)
+        task.report(1, 2)  # raises TaskCancelled
+        return "too late"
+
+    widget, task = start_task(work, events)
+    started.wait(10)
+    task.cancel()
+    assert events == [("finish", None)]  # on_finish runs from cancel() itself
+    release.set()
+    widget.run_polls(task)
+    assert isinstance(task.future.exception(), background.TaskCancelled)
+    assert [e for e in events if e[0] != "progress"] == [("finish", None)]
+
+
+def test_run_chunked_without_task():
+    assert background.run_chunked(None, lambda items: items[::-1], [1, 2, 3]) == [3, 2, 1]
+
+
+def test_instrumentation_spans_and_dump(tmp_path):
+    timing = instrumentation.Instrumentation()
+    seen = []
+    timing.add_hook(seen.append)
+    timing.new_round()
+    timing.start_thinking("primes")
+    timing.stop_thinking()
+    timing.stop_thinking()  # no turn in progress: nothing recorded
+    with timing.span("inverse", stage="keys"):
+        pass
+    with pytest.raises(ZeroDivisionError):
+        with timing.span("pow"):
+            1 / 0
+    timing.new_round()
+    timing.record("pow", instrumentation.COMPUTE, 100, 350)
+    timing.remove_hook(seen.append)
+    timing.record("unhooked", instrumentation.COMPUTE, 0, 1)
+
+    assert [(s["name"], s["kind"], s["round"]) for s in seen] == [
+        ("primes", "think", 1), ("inverse", "compute", 1), ("pow", "compute", 1),
+        ("pow", "compute", 2)]
+    assert seen[1]["stage"] == "keys"
+    assert seen[2]["error"] == "ZeroDivisionError"
+    assert all(s["duration_ns"] >= 0 for s in timing.spans)
+    assert timing.totals(2) == {("compute", "pow"): 250, ("compute", "unhooked"): 1}
+    assert timing.totals()[("compute", "pow")] == 250 + seen[2]["duration_ns"]
+
+    path = tmp_path / "timings.json"
+    timing.dump(str(path))
+    with open(path, encoding="utf-8") as f:
+        dumped = json.load(f)
+    assert dumped["clock"] == "perf_counter_ns"
+    assert dumped["spans"] == timing.spans
+    assert dumped["totals_ns"]["compute"]["pow"] == timing.totals()[("compute", "pow")]
+    timing.clear()
+    assert timing.spans == [] and timing.totals() == {}
+
+
+def test_simulated_players_round_trip(tmp_path):
+    options = {"mix": simulator.parse_mix("easy=1,medium=1,hard=1"),
+               "message_length": simulator.parse_range("5-40"), "packed": 0.5,
+               "rounds": 2, "seed": 7, "url": None, "path": str(tmp_path / "sim.jsonl")}
+    records = simulator.run_players(0, 3, options)
+    assert len(records) == 6
+    for difficulty, latencies, ok in records:
+        assert ok
+        assert difficulty in rsa_engine.DIFFICULTY_RANGES
+        assert set(latencies) == set(simulator.STAGES)
+    assert leaderboard_store.JsonLinesStore(options["path"]).count == 6
+    assert simulator.report(records, 1.0, 1) == 0
+
+
+def test_simulator_options(capsys):
+    assert simulator.parse_mix("easy=5,Hard") == ([1, 3], [5.0, 1.0])
+    assert simulator.parse_range("50") == (50, 50)
+    with pytest.raises(SystemExit):
+        simulator.main(["--mix", "impossible=1"])
+    capsys.readouterr()
+    assert simulator.main(["--players", "2", "--message-length", "3-8", "--seed", "1"]) == 0
+    assert "2 rounds" in capsys.readouterr().out